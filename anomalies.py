@@ -0,0 +1,62 @@
+"""Поиск аномальных объявлений: робастные z-оценки цены и выбросы по IQR"""
+
+import numpy as np
+import pandas as pd
+
+PRICE_GROUPS = ['locality_name', 'rooms', 'floor_kind']
+IQR_COLUMNS = ['ceiling_height', 'total_area', 'days_exposition']
+
+# Множитель, с которым MAD нормального распределения равен его сигме
+MAD_TO_SIGMA = 0.6745
+# Выбросы по IQR - "далёкие" по Тьюки: с k=1.5 длинные хвосты площади и
+# срока продажи отмечают слишком много обычных объявлений
+IQR_K = 3.0
+# Доля отмеченных объявлений, выше которой флаг бесполезен для ручной проверки
+MAX_ANOMALY_SHARE = 0.1
+
+
+def robust_zscore(df, column='square_meter_price', by=PRICE_GROUPS):
+    """Робастная z-оценка column внутри групп by: (x - медиана) / MAD.
+
+    Считается двумя groupby-transform по одним и тем же ключам. Для групп
+    с нулевым MAD (например, из одного объявления) оценка не определена.
+    """
+    keys = [df[key] for key in by]
+    values = df[column]
+    deviation = values - values.groupby(keys, observed=True).transform('median')
+    mad = deviation.abs().groupby(keys, observed=True).transform('median')
+    return (MAD_TO_SIGMA * deviation / mad.where(mad > 0)).rename(f'{column}_zscore')
+
+
+def iqr_outliers(df, columns=IQR_COLUMNS, k=IQR_K, imputed=None):
+    """Флаги выбросов по правилу k * IQR для каждого столбца; квартили считаются один раз.
+
+    imputed - маски заполненных при предобработке значений (пропуски
+    исходного архива) по столбцам, выровненные по индексу. Заполненные
+    значения - медианы: они сжимают межквартильный размах и в квартилях
+    не участвуют, а сами выбросами не отмечаются.
+    """
+    values = df[columns]
+    if imputed is not None:
+        masks = pd.DataFrame(imputed).reindex(index=df.index, columns=columns, fill_value=False)
+        values = values.mask(masks.astype(bool))
+    quartiles = values.quantile([0.25, 0.75])
+    spread = quartiles.loc[0.75] - quartiles.loc[0.25]
+    lower = quartiles.loc[0.25] - k * spread
+    upper = quartiles.loc[0.75] + k * spread
+    # Сравнение с NaN ложно, поэтому заполненные значения не отмечаются
+    flags = values.lt(lower) | values.gt(upper)
+    return flags.add_suffix('_outlier')
+
+
+def score_anomalies(df, threshold=3.5, column='square_meter_price', by=PRICE_GROUPS,
+                    columns=IQR_COLUMNS, k=IQR_K, imputed=None):
+    """Таблица аномалий по объявлениям: z-оценка цены, флаги выбросов и общий флаг.
+
+    imputed - маски заполненных значений для iqr_outliers.
+    """
+    zscore = robust_zscore(df, column, by)
+    scores = pd.concat([zscore, iqr_outliers(df, columns, k, imputed)], axis=1)
+    scores[f'{column}_anomaly'] = np.abs(zscore.to_numpy()) > threshold
+    scores['is_anomaly'] = scores.drop(columns=zscore.name).any(axis=1)
+    return scores
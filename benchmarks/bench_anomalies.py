@@ -0,0 +1,38 @@
+"""Пропускная способность оценки аномалий на размноженном датасете.
+
+Выбросы считаются по наблюдённым значениям (маски пропусков исходного
+архива); доля отмеченных объявлений не должна превышать MAX_ANOMALY_SHARE.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_anomalies --scales 10 100 1000
+"""
+
+import argparse
+
+from anomalies import IQR_COLUMNS, MAX_ANOMALY_SHARE, PRICE_GROUPS, score_anomalies
+from benchmarks.common import measure, replicate
+from cache import load_clean_listings
+from features import add_derived_features
+from ingest import read_listings
+
+COLUMNS = ['square_meter_price', *PRICE_GROUPS, *IQR_COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    base = add_derived_features(load_clean_listings())[COLUMNS]
+    imputed = read_listings(usecols=IQR_COLUMNS).isna()
+    for scale in args.scales:
+        data = replicate(base, scale)
+        scores, seconds = measure(score_anomalies, data, imputed=replicate(imputed, scale))
+        share = scores['is_anomaly'].mean()
+        print(f"x{scale:<5} rows={len(data):<10} {seconds:7.2f}s "
+              f"{len(data) / seconds:>12,.0f} listings/s  anomalies={share:.1%}")
+        assert share <= MAX_ANOMALY_SHARE, f'отмечено {share:.1%} объявлений, больше {MAX_ANOMALY_SHARE:.0%}'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""Холодный и тёплый старт загрузки очищенного датафрейма через кэш.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_cache
+"""
+
+import tempfile
+
+import pandas as pd
+
+from benchmarks.common import measure
+from cache import load_clean_listings
+
+
+def main():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold, cold_time = measure(load_clean_listings, cache_dir=cache_dir)
+        warm, warm_time = measure(load_clean_listings, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(cold, warm)
+    print(f"cold (read + preprocess + write) {cold_time * 1000:8.1f}ms")
+    print(f"warm (stat + memory-mapped read) {warm_time * 1000:8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
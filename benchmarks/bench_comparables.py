@@ -0,0 +1,115 @@
+"""Пакетный поиск аналогов по индексу против полного булева перебора архива.
+
+Новые объявления - случайные объявления архива с шумом в признаках.
+Перебор - прежний способ: маска по населённому пункту и допускам на
+признаки для каждого запроса; он замеряется на --scan-queries запросах и
+пересчитывается на всё число запросов.
+
+Ответы индекса на --check-queries запросах сверяются с точным перебором:
+расстояния до всех объявлений того же населённого пункта в тех же
+нормированных признаках, k ближайших через np.argpartition и все
+объявления не дальше радиуса. В архиве есть копии объявлений на равном
+расстоянии, поэтому среди аналогов на k-м расстоянии допускается любой
+выбор, а все более близкие должны совпасть.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_comparables --archive-scale 10 --queries 100000
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.common import measure, replicate
+from cache import load_clean_listings
+from comparables import FEATURES, ComparablesIndex
+
+
+def new_listings(df, count, seed=0):
+    rng = np.random.default_rng(seed)
+    known = df.dropna(subset=FEATURES)
+    listings = known.sample(count, replace=True, random_state=seed).reset_index(drop=True)
+    for column in ['cityCenters_nearest', 'airports_nearest', 'total_area']:
+        listings[column] = listings[column] * rng.normal(1, 0.05, count)
+    return listings
+
+
+def scan(df, listing, tolerance=0.1):
+    """Аналоги полным перебором: тот же населённый пункт, признаки в пределах ±10%"""
+    mask = df['locality_name'] == listing['locality_name']
+    for column in FEATURES:
+        mask &= (df[column] - listing[column]).abs() <= abs(listing[column]) * tolerance
+    return df.index[mask]
+
+
+def brute_force_distances(index, archive, listing):
+    """Метки объявлений архива того же населённого пункта и расстояния до них в нормированных признаках"""
+    values = archive[index.features].to_numpy(dtype='float64', na_value=np.nan)
+    rows = (archive[index.by] == listing[index.by]).to_numpy() & ~np.isnan(values).any(axis=1)
+    point = (np.array([listing[column] for column in index.features], dtype='float64') - index.center) / index.scale
+    distances = np.linalg.norm((values[rows] - index.center) / index.scale - point, axis=1)
+    return archive.index.to_numpy()[rows], distances
+
+
+def check_queries(index, archive, listings, k, radius):
+    """Аналоги из query и query_radius против перебора по каждому объявлению listings.
+
+    Возвращает число проверенных пар из query и из query_radius.
+    """
+    pairs = index.query(listings, k=k), index.query_radius(listings, radius)
+    knn, within = (found.groupby('listing') for found in pairs)
+    for label, listing in listings.iterrows():
+        labels, distances = brute_force_distances(index, archive, listing)
+        nearest = np.argpartition(distances, min(k, len(distances)) - 1)[:k]
+        expected = np.sort(distances[nearest])
+        found = knn.get_group(label)
+        np.testing.assert_allclose(found['distance'].to_numpy(), expected, rtol=1e-9, atol=1e-12)
+        closer = set(labels[distances < expected[-1] - 1e-9])
+        assert closer <= set(found['comparable']), label
+        assert set(found['comparable']) <= set(labels[distances <= expected[-1] + 1e-9]), label
+
+        # Объявления на самой границе радиуса могут попасть в ответ из-за округления
+        inside = set(labels[distances <= radius - 1e-9])
+        found = set(within.get_group(label)['comparable']) if label in within.groups else set()
+        assert inside <= found <= set(labels[distances <= radius + 1e-9]), label
+        if label in within.groups:
+            np.testing.assert_allclose(
+                np.sort(within.get_group(label)['distance'].to_numpy()),
+                np.sort(distances[np.isin(labels, within.get_group(label)['comparable'])]),
+                rtol=1e-9, atol=1e-12,
+            )
+    return [len(found) for found in pairs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--archive-scale', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=100_000)
+    parser.add_argument('--scan-queries', type=int, default=100)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--radius', type=float, default=0.05)
+    parser.add_argument('--check-queries', type=int, default=200)
+    args = parser.parse_args()
+
+    archive = replicate(load_clean_listings(), args.archive_scale)
+    listings = new_listings(archive, args.queries)
+
+    index, build_time = measure(ComparablesIndex, archive)
+    result, query_time = measure(index.query, listings, k=args.k)
+    _, radius_time = measure(index.query_radius, listings.head(args.queries // 10), args.radius)
+    rows = listings.head(args.scan_queries).to_dict('records')
+    _, scan_time = measure(lambda: [scan(archive, row) for row in rows])
+    checked = check_queries(index, archive, listings.sample(args.check_queries, random_state=1), args.k, args.radius)
+
+    print(f"archive rows={len(archive)} queries={len(listings)} k={args.k}")
+    print(f"  build index        {build_time:8.3f}s")
+    print(f"  knn batch query    {query_time:8.3f}s  ({len(listings) / query_time:,.0f} listings/s, "
+          f"{len(result)} pairs)")
+    print(f"  radius query (10%) {radius_time:8.3f}s")
+    print(f"  brute-force check  {args.check_queries} listings: {checked[0]} knn and {checked[1]} radius pairs match")
+    print(f"  boolean scan       {scan_time / len(rows) * len(listings):8.1f}s estimated "
+          f"for all queries ({scan_time / len(rows) * 1000:.2f}ms per query)")
+
+
+if __name__ == '__main__':
+    main()
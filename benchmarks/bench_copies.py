@@ -0,0 +1,71 @@
+"""Копии датафрейма по этапам конвейера pipeline.py под tracemalloc.
+
+Для каждого этапа StageProfiler(trace_memory=True) даёт пик выделенной
+за этап памяти в размерах входного датафрейма. Скрипт проверяет, что
+этапы укладываются в COPY_LIMITS, то есть пиковая память этапов анализа
+не превышает примерно 1.5 размера очищенного датафрейма, и завершается с
+ошибкой, если это не так. Этап center повторяет анализ центра
+Санкт-Петербурга из Шага 4 project2.py (корреляции, медианы, сравнение
+сегментов и гистограммы по маскам строк), так что проверка ловит и
+копии сегментов в ноутбуке. На исходном датасете (--scales 1) преобладают
+постоянные буферы отрисовки matplotlib, поэтому по умолчанию проверяется
+синтетический архив в 10 раз больше. Запуск из корня репозитория:
+    python -m benchmarks.bench_copies --scales 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmarks.synthetic import write_synthetic_listings
+from ingest import DATASET
+from pipeline import Pipeline, StageProfiler, frame_bytes, get_stages
+
+# Допустимое число копий входного датафрейма, одновременно живущих в этапе.
+# load считается от выходного датафрейма (буферы парсера CSV); impute и
+# derive держат ключи и результаты groupby-transform и новые столбцы;
+# этапы анализа работают по маскам и отдельным столбцам
+COPY_LIMITS = {
+    'load': 1.5,
+    'impute': 1.0,
+    'derive': 1.0,
+    'analyse': 0.6,
+    'center': 0.6,
+    'plot': 0.6,
+}
+
+
+def check_copies(path, plots_dir):
+    profiler = StageProfiler(trace_memory=True)
+    df = Pipeline(get_stages(path, plots_dir), [profiler]).run()
+    report = profiler.to_frame()[['seconds', 'rows_in', 'rows_out', 'allocated_mb', 'copies']]
+    report['limit'] = [COPY_LIMITS[stage] for stage in report.index]
+    return report, frame_bytes(df) / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[10])
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            path = DATASET
+            if scale > 1:
+                with open(DATASET, encoding='utf-8') as source:
+                    rows = (sum(1 for _ in source) - 1) * scale
+                path = write_synthetic_listings(os.path.join(directory, f'synthetic-x{scale}.csv'), rows)
+            report, frame_mb = check_copies(path, os.path.join(directory, 'plots'))
+            print(f"x{scale}: очищенный датафрейм {frame_mb:.1f}MB")
+            print(report.to_string(float_format='{:.2f}'.format))
+            over = report[report['copies'] > report['limit']]
+            if not over.empty:
+                failed = True
+                print(f"  превышение: {', '.join(over.index)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Сравнение исходного и векторизованного заполнения days_exposition.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_days_exposition --scales 10 100 1000
+"""
+
+import argparse
+
+import pandas as pd
+
+from benchmarks import legacy
+from benchmarks.common import load_dataset, measure, replicate
+from imputers import fill_hierarchical_median
+
+COLUMNS = ['first_day_exposition', 'days_exposition']
+
+
+def fill_days_exposition(df):
+    """Новая реализация: части даты считаются один раз"""
+    dates = df['first_day_exposition'].dt
+    year, month = dates.year, dates.month
+    return fill_hierarchical_median(df, 'days_exposition', [[year, month], [year]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--legacy-max-scale', type=int, default=100,
+                        help='исходная версия не запускается на больших масштабах')
+    args = parser.parse_args()
+
+    base = load_dataset(usecols=COLUMNS)
+    for scale in args.scales:
+        data = replicate(base, scale)
+        new, new_time = measure(fill_days_exposition, data.copy())
+        line = f"x{scale:<5} rows={len(data):<10} vectorized={new_time:.3f}s"
+        if scale <= args.legacy_max_scale:
+            old, old_time = measure(legacy.get_median_days_exposition, data.copy())
+            pd.testing.assert_series_equal(old['days_exposition'], new['days_exposition'])
+            line += f" legacy={old_time:.3f}s speedup={old_time / new_time:.0f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Сравнение кривой цены по каждому метру (get_mean_per_m) и по интервалам.
+
+Чтобы число различных расстояний росло вместе с архивом, расстояния в
+каждой копии датасета сдвигаются на номер копии в метрах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_distance_profile --scales 1 4 16 64
+"""
+
+import argparse
+
+import pandas as pd
+
+from benchmarks import legacy
+from benchmarks.common import measure
+from cache import load_clean_listings
+from distance import get_distance_profile
+
+
+def jittered(df, factor):
+    parts = [df.assign(cityCenters_nearest=df['cityCenters_nearest'] + i) for i in range(factor)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--legacy-max-scale', type=int, default=4)
+    args = parser.parse_args()
+
+    df = load_clean_listings()
+    spb = df[(df['locality_name'] == 'санкт-петербург') & (df['cityCenters_nearest'] >= 0)]
+    spb = spb[['cityCenters_nearest', 'last_price']].astype({'cityCenters_nearest': int})
+
+    for scale in args.scales:
+        data = jittered(spb, scale)
+        profile, km_time = measure(get_distance_profile, data, bin_size=1000, smooth=3)
+        _, quantile_time = measure(get_distance_profile, data, q=50)
+        line = (f"x{scale:<3} rows={len(data):<8} distinct={data['cityCenters_nearest'].nunique():<7} "
+                f"per-km={km_time:.4f}s equal-frequency={quantile_time:.4f}s")
+        if scale <= args.legacy_max_scale:
+            _, old_time = measure(legacy.get_distance_curve, data)
+            line += f" per-metre={old_time:.2f}s speedup={old_time / km_time:.0f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
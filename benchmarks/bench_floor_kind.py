@@ -0,0 +1,47 @@
+"""Сравнение построчного apply(get_flat_floor) и векторизованного get_floor_kind.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_floor_kind --scales 1 10 100
+"""
+
+import argparse
+
+from benchmarks import legacy
+from benchmarks.common import load_dataset, measure, replicate
+from features import get_floor_kind
+
+
+def legacy_floor_kind(df):
+    """Исходный расчёт вместе с последующим переводом в коды категорий"""
+    floor_kind = df[['floor', 'floors_total']].apply(legacy.get_flat_floor, axis=1)
+    return floor_kind, floor_kind.astype('category').cat.codes
+
+
+def vectorized_floor_kind(df):
+    floor_kind = get_floor_kind(df['floor'], df['floors_total'])
+    return floor_kind, floor_kind.cat.codes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--legacy-max-scale', type=int, default=10)
+    args = parser.parse_args()
+
+    base = load_dataset(usecols=['floor', 'floors_total'])
+    base['floors_total'] = base['floors_total'].fillna(base['floors_total'].mean()).astype(int)
+
+    for scale in args.scales:
+        data = replicate(base, scale)
+        (new, new_codes), new_time = measure(vectorized_floor_kind, data)
+        line = f"x{scale:<4} rows={len(data):<9} np.select={new_time:.4f}s"
+        if scale <= args.legacy_max_scale:
+            (old, old_codes), old_time = measure(legacy_floor_kind, data)
+            assert (old == new.astype(str)).all()
+            assert (old_codes == new_codes).all()
+            line += f" apply={old_time:.3f}s speedup={old_time / new_time:.0f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Память картографических столбцов и расчётов по ним: заглушка -999.99 против NaN.
+
+Было: float64 с заглушкой -999.99 и фильтр df[df[column] != -999.99] перед
+каждым расчётом. Стало: float32 с NaN, расчёты по всему датафрейму.
+Пиковая память расчёта замеряется через tracemalloc.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_geo_columns --scales 1 10
+"""
+
+import argparse
+import tracemalloc
+
+from benchmarks.common import measure, replicate
+from cache import load_clean_listings
+from correlation import correlate
+from features import add_derived_features
+from preprocessing import GEO_COLUMNS
+
+SENTINEL = -999.99
+
+
+def with_sentinels(df):
+    """Датафрейм в прежнем виде: float64 с заглушкой вместо пропусков"""
+    df = df.copy()
+    for column in GEO_COLUMNS:
+        df[column] = df[column].astype('float64').fillna(SENTINEL)
+    return df
+
+
+def sentinel_analysis(df):
+    """Расчёты из project2.py, для которых приходилось фильтровать заглушку"""
+    correlation = df['last_price'].corr(df[df['cityCenters_nearest'] != SENTINEL]['cityCenters_nearest'])
+    spb = df[(df['locality_name'] == 'санкт-петербург') & (df['cityCenters_nearest'] != SENTINEL)]
+    medians = {column: df[df[column] != SENTINEL][column].median() for column in GEO_COLUMNS}
+    return correlation, len(spb), medians
+
+
+def nan_analysis(df):
+    correlation = correlate(df, 'last_price', ['cityCenters_nearest'])['correlation'].iloc[0]
+    spb = df[(df['locality_name'] == 'санкт-петербург') & df['cityCenters_nearest'].notna()]
+    medians = df[GEO_COLUMNS].median().to_dict()
+    return correlation, len(spb), medians
+
+
+def profile(func, df):
+    tracemalloc.start()
+    result, seconds = measure(func, df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    args = parser.parse_args()
+
+    base = add_derived_features(load_clean_listings())
+    for scale in args.scales:
+        after = replicate(base, scale)
+        before = with_sentinels(after)
+        before_mb = before[GEO_COLUMNS].memory_usage(index=False).sum() / 2 ** 20
+        after_mb = after[GEO_COLUMNS].memory_usage(index=False).sum() / 2 ** 20
+
+        old, old_time, old_peak = profile(sentinel_analysis, before)
+        new, new_time, new_peak = profile(nan_analysis, after)
+        assert abs(old[0] - new[0]) < 1e-9 and old[1] == new[1]
+
+        print(f"x{scale} rows={len(after)}")
+        print(f"  geo columns: sentinel float64 {before_mb:7.1f}MB -> NaN float32 {after_mb:7.1f}MB")
+        print(f"  analysis:    sentinel {old_time:.3f}s peak {old_peak:7.1f}MB -> "
+              f"NaN {new_time:.3f}s peak {new_peak:7.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
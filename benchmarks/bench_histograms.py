@@ -0,0 +1,87 @@
+"""Время отрисовки набора гистограмм из project2.py: plot(kind='hist') против кэша частот.
+
+Старый вариант рисует каждую гистограмму по сырому столбцу и сохраняет
+текущую фигуру, новый берёт частоты из HistogramCache. Оба пишут PNG
+через бэкенд Agg. Запуск из корня репозитория:
+    python -m benchmarks.bench_histograms --scales 1 10 100
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+from benchmarks import legacy  # noqa: E402
+from benchmarks.common import measure, replicate  # noqa: E402
+from cache import load_clean_listings  # noqa: E402
+from histograms import HistogramCache, render_histograms  # noqa: E402
+
+# Три вызова print_hist_plots для df из Шага 4 project2.py
+CALLS = [
+    (['total_area', 'last_price', 'rooms', 'ceiling_height'],
+     [100, 100, 10, 20],
+     [(0, 400), (0, 40000000), (0, 9), (2.25, 4)],
+     [None, None, None, None]),
+    (['days_exposition'], [100], [(0, 600)], [None]),
+    (['total_area', 'last_price', 'rooms', 'ceiling_height', 'days_exposition'],
+     [80, 30, 5, 10, 80],
+     [(0, 150), (0, 15000000), (0, 5), (2.25, 3.25), (0, 300)],
+     [(0, 1100), None, None, None, (0, 600)]),
+]
+COLUMNS = sorted({column for columns, *_ in CALLS for column in columns})
+
+
+def legacy_figures(df, directory):
+    """Исходный print_hist_plots, где plt.show() заменён сохранением фигуры"""
+    count = 0
+    show = plt.show
+
+    def save():
+        nonlocal count
+        plt.savefig(os.path.join(directory, f'legacy_{count}.png'))
+        plt.close('all')
+        count += 1
+
+    plt.show = save
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for columns, bins, ranges, ylims in CALLS:
+                legacy.print_hist_plots(df, columns, bins, ranges, ylims, columns)
+    finally:
+        plt.show = show
+    return count
+
+
+def cached_figures(df, directory):
+    histograms = HistogramCache(df)
+    paths = []
+    for number, (columns, bins, ranges, ylims) in enumerate(CALLS):
+        paths += render_histograms(histograms, columns, bins, ranges, ylims, columns,
+                                   directory=directory, prefix=f'call{number}')
+    return len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    base = load_clean_listings()[COLUMNS]
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            data = replicate(base, scale)
+            figures, legacy_seconds = measure(legacy_figures, data, directory)
+            _, seconds = measure(cached_figures, data, directory)
+            print(f"x{scale:<5} rows={len(data):<10} figures={figures}  "
+                  f"legacy {legacy_seconds:6.2f}s  cached {seconds:6.2f}s  "
+                  f"speedup {legacy_seconds / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
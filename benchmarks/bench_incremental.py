@@ -0,0 +1,116 @@
+"""Инкрементальная предобработка ежедневных пачек против полного пересчёта.
+
+Архив - объявления до --split-date, дальше объявления поступают пачками
+по дням публикации. Проверяется:
+- накопленная после всех пачек статистика каждой группы совпадает с
+  полным пересчётом (TOLERANCE - для каскада жилой площади, где архив
+  заполнялся медианами на момент fit);
+- заполненные в пачке значения совпадают с полным пересчётом по данным,
+  известным на день пачки (архив и пачки до неё включительно), в
+  пределах FILLED_TOLERANCE. Сравнивать с пересчётом по всем пачкам
+  нельзя: он видит более поздние объявления, а медиана срока продажи
+  недавнего месяца растёт, пока объявления месяца продаются.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_incremental --split-date 2019-03-01
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import measure
+from imputers import assign_buckets
+from incremental import IncrementalPreprocessor
+from ingest import read_listings
+from preprocessing import preprocess
+
+# Допустимое относительное расхождение заполненных значений с пересчётом на день пачки:
+# границы децилей жилой площади фиксируются при fit, а архив не перезаполняется
+FILLED_TOLERANCE = {
+    'days_exposition': 0.0,
+    'living_area': 0.02,
+    'kitchen_area': 0.05,
+    'floors_total': 0.0,
+    'ceiling_height': 0.0,
+}
+TOLERANCE = 0.01
+
+
+def check_statistics(preprocessor, raw, processed):
+    """Накопленная статистика после всех пачек против полного пересчёта.
+
+    processed - архив после fit и все пачки после update: по нему
+    считаются группы, которые зависят от уже заполненных значений.
+    """
+    dates = raw['first_day_exposition'].dt
+    by_area = raw['living_area'].fillna(raw['living_area'].groupby(raw['total_area']).transform('median'))
+    buckets = assign_buckets(processed.loc[raw.index, 'living_area'], preprocessor.living_edges)
+    checks = [
+        ('days by year, month', preprocessor.days_by_month,
+         raw['days_exposition'].groupby([dates.year, dates.month]).median(), 0),
+        ('days by year', preprocessor.days_by_year, raw['days_exposition'].groupby(dates.year).median(), 0),
+        ('living by total_area', preprocessor.living_by_area,
+         raw['living_area'].groupby(raw['total_area']).median().dropna(), 0),
+        # Архив заполнялся по своим медианам площади, полный пересчёт - по медианам всех данных
+        ('living by rooms', preprocessor.living_by_rooms, by_area.groupby(raw['rooms']).median().dropna(), TOLERANCE),
+        ('kitchen by decile', preprocessor.kitchen_by_decile,
+         raw['kitchen_area'].groupby(buckets, observed=True).median().dropna(), 0),
+        ('ceiling_height', preprocessor.ceiling, pd.Series({0: raw['ceiling_height'].median()}), 0),
+        ('last_price', preprocessor.last_price, pd.Series({0: raw['last_price'].median()}), 0),
+    ]
+    for name, state, expected, rtol in checks:
+        actual = state.group_medians()
+        expected = expected.sort_index()
+        assert len(actual) == len(expected), f'{name}: {len(actual)} groups, expected {len(expected)}'
+        np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=rtol, err_msg=name)
+        print(f"  statistics {name:<22} {len(actual)} groups match the full recompute (rtol={rtol})")
+
+
+def check_filled(raw, split, batches, updated):
+    """Заполненные в пачках значения против полного пересчёта на день каждой пачки"""
+    differences = {column: [] for column in FILLED_TOLERANCE}
+    known = split.copy()
+    for batch, result in zip(batches, updated):
+        known[batch.index] = True
+        full = preprocess(raw[known].copy())
+        for column, found in differences.items():
+            was_missing = batch[column].isna()
+            new = result.loc[was_missing, column].to_numpy(dtype='float64')
+            expected = full.loc[batch.index[was_missing], column].to_numpy(dtype='float64')
+            found.append(np.abs(new - expected) / np.abs(expected))
+    for column, found in differences.items():
+        relative = np.concatenate(found)
+        worst = relative.max() if len(relative) else 0.0
+        print(f"  filled {column:<16} {len(relative):<5} values, max rel diff {worst:.2%} "
+              f"(tolerance {FILLED_TOLERANCE[column]:.0%})")
+        assert worst <= FILLED_TOLERANCE[column], f'{column}: {worst:.2%}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--split-date', default='2019-03-01')
+    args = parser.parse_args()
+
+    raw = read_listings()
+    split = raw['first_day_exposition'] < pd.Timestamp(args.split_date)
+    batches = [batch for _, batch in raw[~split].groupby(raw['first_day_exposition'].dt.date)]
+
+    preprocessor = IncrementalPreprocessor()
+    archive, fit_time = measure(preprocessor.fit, raw[split].copy())
+    start = time.perf_counter()
+    updated = [preprocessor.update(batch.copy()) for batch in batches]
+    update_time = time.perf_counter() - start
+    _, full_time = measure(preprocess, raw.copy())
+
+    print(f"archive={split.sum()} rows, {len(batches)} daily batches with {sum(map(len, updated))} rows")
+    print(f"  full recompute {full_time:.3f}s, fit {fit_time:.3f}s, "
+          f"update {update_time / len(batches) * 1000:.2f}ms per batch")
+    check_filled(raw, split, batches, updated)
+    check_statistics(preprocessor, raw, pd.concat([archive, *updated]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Сравнение исходной загрузки CSV и загрузки по явной схеме: время и пиковая память.
+
+Каждый вариант запускается в отдельном процессе, пиковая память - прирост
+ru_maxrss относительно процесса с уже импортированным pandas. Для большого
+синтетического файла (строки исходного датасета, повторённые до нужного
+числа) полная загрузка выполняется только до --full-load-max-rows строк,
+дальше измеряется потоковая агрегация по частям.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_ingest --synthetic-rows 50000000
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import ingest
+from benchmarks.common import DATASET
+
+
+def current_load(path):
+    """Загрузка и исправление типов так, как это делалось в project2.py"""
+    df = pd.read_csv(path, delimiter='\t')
+    df['is_apartment'] = df['is_apartment'].fillna(False).astype(bool)
+    df['first_day_exposition'] = pd.to_datetime(df['first_day_exposition'], format='%Y-%m-%dT%H:%M:%S')
+    df['last_price'] = df['last_price'].astype(int)
+    return df
+
+
+def typed_load(path):
+    return ingest.read_listings(path)
+
+
+def chunked_aggregate(path, chunksize):
+    """Медиана не сливается по частям, поэтому считаем count/sum/min/max/mean"""
+    chunks = ingest.iter_listings(path, chunksize=chunksize, usecols=['locality_name', 'last_price'])
+    return ingest.aggregate_chunks(chunks, 'locality_name', 'last_price')
+
+
+def run(name, path, chunksize=None):
+    """Выполняется в дочернем процессе: время, прирост пиковой памяти, размер результата"""
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if name == 'chunked':
+        result = chunked_aggregate(path, chunksize)
+    else:
+        result = {'current': current_load, 'typed': typed_load}[name](path)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    return seconds, peak / 1024, result.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def measure_in_subprocess(name, path, chunksize=None):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run, name, path, chunksize).result()
+
+
+def write_synthetic(path, rows):
+    """Синтетический файл той же схемы из повторённых строк исходного датасета"""
+    with open(DATASET, encoding='utf-8') as source:
+        header = source.readline()
+        lines = source.readlines()
+    with open(path, 'w', encoding='utf-8') as target:
+        target.write(header)
+        for _ in range(rows // len(lines)):
+            target.writelines(lines)
+        target.writelines(lines[:rows % len(lines)])
+
+
+def report(title, path, rows, args):
+    print(f"{title}: {rows} rows, {os.path.getsize(path) / 2 ** 20:.0f}MB on disk")
+    variants = ['chunked']
+    if rows <= args.full_load_max_rows:
+        variants = ['current', 'typed', 'chunked']
+    for name in variants:
+        seconds, peak, frame = measure_in_subprocess(name, path, args.chunksize)
+        print(f"  {name:<8} {seconds:8.2f}s  peak +{peak:8.1f}MB  result {frame:8.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--synthetic-rows', type=int, default=50_000_000)
+    parser.add_argument('--full-load-max-rows', type=int, default=5_000_000)
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    args = parser.parse_args()
+
+    report('bundled', DATASET, sum(1 for _ in open(DATASET, encoding='utf-8')) - 1, args)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'synthetic.csv')
+        write_synthetic(path, args.synthetic_rows)
+        report('synthetic', path, args.synthetic_rows, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Сравнение исходного и квантильного заполнения kitchen_area: время и память.
+
+Исходная версия сортирует весь датафрейм и добавляет столбец quantile_areas,
+новая - только назначает корзины и заполняет один столбец. Пиковая память
+замеряется через tracemalloc на полном наборе столбцов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_kitchen_area --scales 1 10 100
+"""
+
+import argparse
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks import legacy
+from benchmarks.common import load_dataset, measure, replicate
+from imputers import fill_cascade_median, fill_quantile_bucket_median
+
+
+def profile(func, df, *args, **kwargs):
+    """Время и пиковый прирост памяти (МБ) при вызове func"""
+    tracemalloc.start()
+    result, seconds = measure(func, df, *args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--sample-size', type=int, default=100_000,
+                        help='размер выборки для приближённых границ корзин')
+    args = parser.parse_args()
+
+    base = load_dataset()
+    base, _ = fill_cascade_median(base, 'living_area', [['total_area'], ['rooms']])
+
+    for scale in args.scales:
+        data = replicate(base, scale)
+        frame_mb = data.memory_usage(deep=True).sum() / 2 ** 20
+
+        old, old_time, old_peak = profile(legacy.get_median_kitchen_area, data.copy())
+        new, new_time, new_peak = profile(
+            fill_quantile_bucket_median, data.copy(), 'kitchen_area', by='living_area')
+        approx, approx_time, approx_peak = profile(
+            fill_quantile_bucket_median, data.copy(), 'kitchen_area', by='living_area',
+            sample_size=args.sample_size)
+
+        pd.testing.assert_series_equal(old['kitchen_area'].sort_index(), new['kitchen_area'])
+        assert list(new.columns) == list(data.columns)
+        approx_diff = (approx['kitchen_area'] != new['kitchen_area']).mean()
+
+        print(f"x{scale} rows={len(data)} frame={frame_mb:.0f}MB")
+        print(f"  legacy      {old_time:8.3f}s  peak {old_peak:8.1f}MB")
+        print(f"  exact       {new_time:8.3f}s  peak {new_peak:8.1f}MB")
+        print(f"  approximate {approx_time:8.3f}s  peak {approx_peak:8.1f}MB"
+              f"  differs from exact in {approx_diff:.2%} rows")
+
+
+if __name__ == '__main__':
+    main()
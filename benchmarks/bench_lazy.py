@@ -0,0 +1,93 @@
+"""Анализ Шага 4 по полному датафрейму (pandas) и запросами к кэшу (lazy.LazyListings).
+
+Оба варианта начинают с Feather-кэша очищенного датафрейма: pandas
+читает его целиком и считает производные признаки, ленивый вариант
+читает только нужные столбцы и строки. Каждый вариант выполняется в
+отдельном процессе; пиковая память - прирост ru_maxrss за время анализа.
+Результаты сравниваются на совпадение. Запуск из корня репозитория:
+    python -m benchmarks.bench_lazy --scales 1 10 50
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic_listings
+from cache import load_clean_listings
+from distance import get_distance_profile
+from features import add_derived_features
+from ingest import DATASET
+from lazy import SPB, LazyListings, spb_segments
+from locality import get_locality_stats, top_localities
+from segments import SegmentComparison
+
+
+def pandas_backend(path, cache_dir):
+    df = add_derived_features(load_clean_listings(path, cache_dir))
+    stats = get_locality_stats(df, quantiles=(0.1, 0.9))
+    stats = top_localities(stats, len(stats))
+    profile = get_distance_profile(df, bin_size=500, smooth=3, locality=SPB)
+    spb = (df['locality_name'] == SPB) & df['cityCenters_nearest'].notna()
+    segments = SegmentComparison(df)
+    segments.add('spb_total', spb)
+    segments.add('spb_center', spb & (df['cityCenters_nearest'] < 7500))
+    return stats, profile, segments.compare('spb_total', 'spb_center')
+
+
+def lazy_backend(path, cache_dir):
+    listings = LazyListings.from_cache(path, cache_dir)
+    stats = listings.locality_stats(quantiles=(0.1, 0.9))
+    stats = top_localities(stats, len(stats))
+    profile = listings.distance_profile(bin_size=500, smooth=3, locality=SPB)
+    segments = listings.segments(spb_segments())
+    return stats, profile, segments.compare('spb_total', 'spb_center')
+
+
+BACKENDS = {'pandas': pandas_backend, 'lazy': lazy_backend}
+
+
+def run(name, path, cache_dir):
+    """Выполняется в дочернем процессе: время, прирост пиковой памяти в МБ, результаты"""
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    result = BACKENDS[name](path, cache_dir)
+    seconds = time.perf_counter() - start
+    return seconds, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024, result
+
+
+def measure_in_subprocess(name, path, cache_dir):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run, name, path, cache_dir).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 50])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            path = DATASET
+            if scale > 1:
+                with open(DATASET, encoding='utf-8') as source:
+                    rows = (sum(1 for _ in source) - 1) * scale
+                path = write_synthetic_listings(os.path.join(directory, f'synthetic-x{scale}.csv'), rows)
+            # Кэш строится заранее, чтобы оба варианта читали готовый файл
+            cache_dir = os.path.join(directory, 'cache')
+            load_clean_listings(path, cache_dir)
+
+            pandas_time, pandas_peak, expected = measure_in_subprocess('pandas', path, cache_dir)
+            lazy_time, lazy_peak, result = measure_in_subprocess('lazy', path, cache_dir)
+            for left, right in zip(expected, result):
+                pd.testing.assert_frame_equal(left, right)
+            print(f"x{scale:<4} pandas {pandas_time:7.3f}s +{pandas_peak:7.1f}MB  "
+                  f"lazy {lazy_time:7.3f}s +{lazy_peak:7.1f}MB  results identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Кривые Каплана-Мейера по сегментам против заполнения days_exposition медианами.
+
+Прежний способ - заполнение пропусков медианами по году и месяцу
+публикации и средний и медианный срок по заполненному столбцу. Новый -
+кривые по сегментам (населённый пункт, комнаты, этаж) с цензурированием
+ещё не снятых объявлений и сроки быстрой, медианной и медленной продажи.
+Кривые нескольких сегментов сверяются с прямым расчётом по определению.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_liquidity --scales 1 10 100
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.common import measure, replicate
+from cache import load_clean_listings
+from features import add_floor_kind
+from ingest import read_listings
+from liquidity import SEGMENTS, get_durations, get_sale_thresholds, get_survival_curves, kaplan_meier
+from preprocessing import get_median_days_exposition
+
+COLUMNS = ['first_day_exposition', 'days_exposition', 'locality_name', 'rooms', 'floor', 'floors_total']
+
+
+def direct_survival(durations, sold):
+    """Доля непроданных по определению: цикл по срокам продаж"""
+    survival, curve = 1.0, []
+    for day in np.unique(durations):
+        at_risk = (durations >= day).sum()
+        survival *= 1 - (sold & (durations == day)).sum() / at_risk
+        curve.append(survival)
+    return np.array(curve)
+
+
+def imputed_summary(raw):
+    days = get_median_days_exposition(raw)['days_exposition']
+    return days.mean(), days.median()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--check-segments', type=int, default=50)
+    args = parser.parse_args()
+
+    raw_source = read_listings(usecols=['first_day_exposition', 'days_exposition'])
+    clean_source = add_floor_kind(load_clean_listings())[COLUMNS + ['floor_kind']]
+    clean_source['days_exposition'] = raw_source['days_exposition']
+
+    durations = get_durations(clean_source, raw_source['days_exposition'].isna())
+    sold = raw_source['days_exposition'].notna().to_numpy()
+    segments = clean_source.groupby(SEGMENTS, observed=True).ngroup().to_numpy()
+    for segment in np.unique(segments)[:args.check_segments]:
+        rows = segments == segment
+        curve = kaplan_meier(durations[rows], sold[rows])['survival'].to_numpy()
+        np.testing.assert_allclose(curve, direct_survival(durations[rows], sold[rows]))
+
+    for scale in args.scales:
+        raw = replicate(raw_source, scale)
+        df = replicate(clean_source, scale)
+        censored = df['days_exposition'].isna()
+        (mean, median), imputed_time = measure(imputed_summary, raw.copy())
+        curves, curves_time = measure(get_survival_curves, df, censored)
+        thresholds, thresholds_time = measure(get_sale_thresholds, curves)
+        overall = get_sale_thresholds(kaplan_meier(get_durations(df, censored), ~censored.to_numpy()))
+
+        print(f"x{scale:<5} rows={len(df):<10} censored={censored.mean():.1%} segments={len(thresholds)}")
+        print(f"  imputed medians       {imputed_time:8.3f}s  mean {mean:.0f} median {median:.0f} days")
+        print(f"  survival curves       {curves_time:8.3f}s  ({len(curves)} rows)")
+        print(f"  sale thresholds       {thresholds_time:8.3f}s  fast {overall['fast'].iat[0]:.0f} "
+              f"median {overall['median'].iat[0]:.0f} slow {overall['slow'].iat[0]:.0f} days")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Сравнение исходного и каскадного заполнения living_area.
+
+Сначала проверяется совпадение результата с исходной функцией на исходном
+датасете, затем замеряется время на растущем числе строк. Чтобы число
+различных total_area росло вместе с архивом (как в реальных выгрузках),
+каждая копия датасета сдвигается на 0.001 м².
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_living_area --scales 1 2 4 8 16 32
+"""
+
+import argparse
+
+import pandas as pd
+
+from benchmarks import legacy
+from benchmarks.common import load_dataset, measure
+from imputers import fill_cascade_median
+
+COLUMNS = ['total_area', 'rooms', 'living_area']
+LEVELS = [['total_area'], ['rooms']]
+
+
+def jittered(df, factor):
+    """Увеличение датасета в factor раз с уникальными total_area в каждой копии"""
+    parts = [df.assign(total_area=df['total_area'] + i * 0.001) for i in range(factor)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--legacy-max-scale', type=int, default=4)
+    args = parser.parse_args()
+
+    base = load_dataset(usecols=COLUMNS)
+    old = legacy.get_median_living_area(base.copy())
+    new, stats = fill_cascade_median(base.copy(), 'living_area', LEVELS)
+    pd.testing.assert_series_equal(old['living_area'], new['living_area'])
+    print('Результат совпадает с get_median_living_area')
+    print(stats, '\n')
+
+    for scale in args.scales:
+        data = jittered(base, scale)
+        _, new_time = measure(fill_cascade_median, data.copy(), 'living_area', LEVELS)
+        line = (f"x{scale:<4} rows={len(data):<9} cascade={new_time:.3f}s "
+                f"({new_time / len(data) * 1e9:.0f} ns/row)")
+        if scale <= args.legacy_max_scale:
+            _, old_time = measure(legacy.get_median_living_area, data.copy())
+            line += f" legacy={old_time:.2f}s ({old_time / len(data) * 1e9:.0f} ns/row)"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
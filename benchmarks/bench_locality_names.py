@@ -0,0 +1,47 @@
+"""Число групп и время groupby по населённым пунктам до и после канонизации названий.
+
+Исходные названия - результат clean_locality_name (strip + lower).
+Канонизация замеряется с пустым кэшем таблицы названий и с заполненным.
+Запуск из корня репозитория:
+    python -m benchmarks.bench_locality_names --scales 1 10 100
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import measure, replicate
+from features import add_square_meter_price
+from ingest import read_listings
+from locality import get_locality_stats
+from locality_names import canonicalize_locality_name, names_path
+from preprocessing import clean_locality_name, fill_locality_name
+
+COLUMNS = ['last_price', 'total_area', 'locality_name']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    base = add_square_meter_price(clean_locality_name(fill_locality_name(read_listings(usecols=COLUMNS))))
+    with tempfile.TemporaryDirectory() as directory:
+        path = names_path(directory)
+        for scale in args.scales:
+            data = replicate(base, scale)
+            if os.path.exists(path):
+                os.remove(path)
+            _, cold = measure(canonicalize_locality_name, data.copy(), directory)
+            canonical, warm = measure(canonicalize_locality_name, data.copy(), directory)
+            before, before_time = measure(get_locality_stats, data, (0.1, 0.9))
+            after, after_time = measure(get_locality_stats, canonical, (0.1, 0.9))
+            print(f"x{scale:<4} rows={len(data):<9} groups {len(before)} -> {len(after)}  "
+                  f"groupby {before_time:.3f}s -> {after_time:.3f}s  "
+                  f"canonicalize cold {cold:.3f}s warm {warm:.3f}s")
+        top = after.nlargest(10, 'count')['count']
+        print('top-10 после канонизации:', ', '.join(f'{name} {count}' for name, count in top.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Сравнение apply(get_mean_square_price) по населённым пунктам и одного groupby.
+
+Исходная версия сканирует весь датафрейм для каждого населённого пункта,
+поэтому замеряется для всех населённых пунктов, а не только для top-10.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_locality_stats --scales 1 10 100
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks import legacy
+from benchmarks.common import measure, replicate
+from cache import load_clean_listings
+from features import add_square_meter_price
+from locality import get_locality_stats, top_localities
+
+
+def legacy_stats(df):
+    localities = df['locality_name'].unique()
+    return {name: legacy.get_mean_square_price(df, name) for name in localities}
+
+
+def grouped_stats(df):
+    return top_localities(get_locality_stats(df, quantiles=(0.1, 0.9)), len(df))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--legacy-max-scale', type=int, default=10)
+    args = parser.parse_args()
+
+    base = add_square_meter_price(load_clean_listings())
+    for scale in args.scales:
+        data = replicate(base, scale)
+        stats, new_time = measure(grouped_stats, data)
+        line = f"x{scale:<4} rows={len(data):<9} localities={len(stats)} groupby={new_time:.3f}s"
+        if scale <= args.legacy_max_scale:
+            old, old_time = measure(legacy_stats, data)
+            medians = stats['median'].astype(int)
+            assert np.array_equal(medians.loc[list(old)].to_numpy(), np.array(list(old.values())))
+            line += f" per-locality={old_time:.3f}s speedup={old_time / new_time:.0f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Запросы медианы цены квадратного метра за окно периодов: MarketIndex против фильтра по архиву.
+
+Фильтр - прежний способ: маска по населённому пункту и датам и медиана
+отобранных строк для каждого запроса. Таблица медиан по периодам
+сверяется с groupby по населённому пункту и периоду, дозаполнение
+последнего месяца через update - с построением индекса заново.
+
+Случайные запросы в основном дешёвые (малые населённые пункты, короткие
+окна), поэтому отдельно замеряются окна в 12 периодов и весь архив по
+крупнейшему населённому пункту: запрос должен укладываться в
+MAX_QUERY_SECONDS на всех масштабах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_market --scales 1 10 100 --queries 10000
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import measure, replicate
+from cache import load_clean_listings
+from features import add_square_meter_price
+from market import MarketIndex
+
+MAX_QUERY_SECONDS = 1e-3
+LARGE_REPEATS = 20
+
+
+def random_windows(df, index, count, seed=0):
+    """Случайные запросы: населённый пункт объявления архива и окно от 1 до 12 периодов"""
+    rng = np.random.default_rng(seed)
+    names = df['locality_name'].to_numpy()[rng.integers(len(df), size=count)]
+    starts = rng.integers(index.first, index.last + 1, size=count)
+    lengths = rng.integers(0, 12, size=count)
+    return [
+        (name, pd.Period(ordinal=start, freq=index.freq), pd.Period(ordinal=start + length, freq=index.freq))
+        for name, start, length in zip(names, starts, lengths)
+    ]
+
+
+def scan(df, periods, name, start, end):
+    rows = (df['locality_name'] == name) & (periods >= start) & (periods <= end)
+    return df.loc[rows, 'square_meter_price'].median()
+
+
+def check_large_windows(df, periods, index):
+    """Время запросов по крупнейшему населённому пункту: последние 12 периодов и весь архив"""
+    name = df['locality_name'].value_counts().index[0]
+    last = pd.Period(ordinal=index.last, freq=index.freq)
+    windows = {
+        '12 periods': (last - 11, last),
+        'full range': (pd.Period(ordinal=index.first, freq=index.freq), last),
+    }
+    timings = {}
+    for label, (start, end) in windows.items():
+        answer, seconds = measure(lambda: [index.median(name, start, end) for _ in range(LARGE_REPEATS)])
+        assert answer[0] == scan(df, periods, name, start, end), label
+        timings[label] = seconds / LARGE_REPEATS
+        assert timings[label] < MAX_QUERY_SECONDS, f'{name} {label}: {timings[label] * 1e3:.2f}ms'
+    _, rolling_time = measure(index.rolling, 12, [name])
+    return name, timings, rolling_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--freq', default='M')
+    parser.add_argument('--queries', type=int, default=10_000)
+    parser.add_argument('--scan-queries', type=int, default=100)
+    args = parser.parse_args()
+
+    source = add_square_meter_price(load_clean_listings())
+    for scale in args.scales:
+        df = replicate(source, scale)
+        periods = df['first_day_exposition'].dt.to_period(args.freq)
+
+        index, build_time = measure(MarketIndex, df, freq=args.freq)
+        table, table_time = measure(index.rolling)
+        expected = df.groupby(['locality_name', periods], observed=True)['square_meter_price'].median().unstack(0)
+        expected = expected.reindex(index=table.index, columns=table.columns)
+        pd.testing.assert_frame_equal(table, expected, check_names=False, check_freq=False)
+
+        windows = random_windows(df, index, args.queries)
+        answers, query_time = measure(lambda: [index.median(*window) for window in windows])
+        checked = windows[:args.scan_queries]
+        scanned, scan_time = measure(lambda: [scan(df, periods, *window) for window in checked])
+        np.testing.assert_allclose(answers[:len(checked)], scanned)
+        assert np.isnan(index.median('нет такого населённого пункта', periods.min()))
+        large, large_times, rolling_time = check_large_windows(df, periods, index)
+
+        last = periods.max()
+        incremental = MarketIndex(df[periods < last], freq=args.freq)
+        _, update_time = measure(incremental.update, df[periods == last])
+        pd.testing.assert_frame_equal(incremental.rolling(3), index.rolling(3)[incremental.rolling(3).columns])
+
+        print(f"x{scale} rows={len(df)} freq={args.freq} localities={len(table.columns)} "
+              f"values {index.nbytes / 2 ** 20:.1f}MB")
+        print(f"  build index           {build_time:8.3f}s")
+        print(f"  medians by period     {table_time:8.3f}s")
+        print(f"  update last period    {update_time:8.3f}s")
+        print(f"  window query          {query_time / len(windows) * 1e6:8.1f}us")
+        print(f"  boolean scan + median {scan_time / len(checked) * 1e6:8.1f}us")
+        for label, seconds in large_times.items():
+            print(f"  {large} {label:<10} {seconds * 1e6:8.1f}us")
+        print(f"  {large} rolling(12)  {rolling_time * 1e3:8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
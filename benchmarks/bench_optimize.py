@@ -0,0 +1,55 @@
+"""Память очищенного датафрейма в исходном представлении project2.py и после optimize.
+
+Исходное представление воспроизводится по очищенному датафрейму: числа
+в int64/float64, строки и этаж - object, плюс промежуточные столбцы
+last_pice и floor_kind_category. Запуск из корня репозитория:
+    python -m benchmarks.bench_optimize --scales 1 10
+"""
+
+import argparse
+
+import pandas as pd
+
+from benchmarks.common import measure, replicate
+from cache import load_clean_listings
+from features import add_derived_features
+from optimize import memory_report, optimize
+
+
+def original_representation(df):
+    """Типы, которые давали read_csv по умолчанию и исходная предобработка"""
+    df = df.copy()
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype) or dtype == 'boolean':
+            df[column] = df[column].astype(object)
+        elif pd.api.types.is_integer_dtype(dtype):
+            df[column] = df[column].astype('int64')
+        elif pd.api.types.is_float_dtype(dtype):
+            df[column] = df[column].astype('float64')
+    df['floor_kind_category'] = df['floor_kind'].astype('category').cat.codes
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--per-column', action='store_true', help='печатать память по столбцам')
+    args = parser.parse_args()
+
+    base = original_representation(add_derived_features(load_clean_listings()))
+    for scale in args.scales:
+        data = replicate(base, scale)
+        before = data.memory_usage(deep=True, index=False)
+        for rtol in (0, 1e-6):
+            optimized, seconds = measure(optimize, data, rtol=rtol)
+            report = memory_report(before, optimized.memory_usage(deep=True, index=False))
+            total = report.loc['total']
+            print(f"x{scale:<4} rows={len(data):<9} rtol={rtol:<6g} {total['before'] / 2**20:8.1f} MiB -> "
+                  f"{total['after'] / 2**20:7.1f} MiB  {total['ratio']:4.1f}x  optimize {seconds:5.2f}s")
+            if args.per_column:
+                print(report.to_string())
+
+
+if __name__ == '__main__':
+    main()
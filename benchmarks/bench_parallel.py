@@ -0,0 +1,69 @@
+"""Масштабирование анализа по населённым пунктам на 1, 2, 4 и 8 процессов.
+
+Чтобы населённых пунктов было больше, копии датасета получают разные
+суффиксы названий, как если бы архив охватывал несколько регионов.
+Результаты для каждого числа процессов сверяются с последовательным
+расчётом get_locality_stats, get_distance_profile и correlate по всему
+датафрейму.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_parallel --scale 20 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+
+import pandas as pd
+
+from benchmarks.common import measure
+from cache import load_clean_listings
+from features import add_derived_features
+from correlation import correlate
+from distance import get_distance_profile
+from locality import get_locality_stats
+from parallel import CORRELATION_FEATURES, analyse_localities
+
+
+def regions(df, factor):
+    parts = []
+    for region in range(factor):
+        names = df['locality_name'].astype(str) + f' ({region})'
+        parts.append(df.assign(locality_name=names.astype('category')))
+    return pd.concat(parts, ignore_index=True).astype({'locality_name': 'category'})
+
+
+def analyse_serial(df, quantiles=(0.1, 0.9), bin_size=1000):
+    """Те же три таблицы, что у analyse_localities, в одном процессе без деления на диапазоны"""
+    stats = get_locality_stats(df, quantiles=quantiles)
+    profiles, correlations = [], []
+    for name, locality in df.groupby('locality_name', observed=True):
+        profiles.append(pd.concat({name: get_distance_profile(locality, bin_size=bin_size)}, names=['locality_name']))
+        correlations.append(correlate(locality, 'last_price', CORRELATION_FEATURES).assign(locality_name=name))
+    return stats, pd.concat(profiles), pd.concat(correlations, ignore_index=True)
+
+
+def check_results(results, expected):
+    for name, actual, serial in zip(['stats', 'profiles', 'correlations'], results, expected):
+        pd.testing.assert_frame_equal(actual, serial, obj=name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    data = regions(add_derived_features(load_clean_listings()), args.scale)
+    print(f"rows={len(data)} localities={data['locality_name'].nunique()} cpus={os.cpu_count()}")
+    expected, serial_time = measure(analyse_serial, data)
+    print(f"  serial     {serial_time:7.2f}s")
+    baseline = None
+    for workers in args.workers:
+        results, seconds = measure(analyse_localities, data, workers=workers)
+        check_results(results, expected)
+        baseline = baseline or seconds
+        print(f"  workers={workers:<2} {seconds:7.2f}s speedup={baseline / seconds:.2f}x  matches serial")
+
+
+if __name__ == '__main__':
+    main()
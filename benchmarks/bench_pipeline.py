@@ -0,0 +1,170 @@
+"""Время и пиковая память каждого этапа project2.py на синтетических архивах разного размера.
+
+Для каждого масштаба (1x - размер real_estate_data.csv) генерируется
+синтетический файл той же схемы (benchmarks/synthetic.py), и весь
+конвейер выполняется в отдельном процессе: загрузка, каждый шаг
+предобработки, производные признаки, сжатие типов, корреляции,
+статистика по населённым пунктам, кривая цены от расстояния и
+гистограммы. Этапы замеряет pipeline.StageProfiler, пиковая память
+этапа - ru_maxrss процесса после этапа.
+
+Результаты пишутся в JSON; с --compare печатается отношение времени
+этапов к прошлому запуску. Запуск из корня репозитория:
+    python -m benchmarks.bench_pipeline --scales 1 10 100 --output bench_pipeline.json
+Масштаб 1000 (около 24 млн строк) требует порядка 10 ГБ памяти.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_histograms import CALLS
+from benchmarks.synthetic import write_synthetic_listings
+from correlation import correlate
+from distance import get_distance_profile
+from features import add_derived_features
+from histograms import HistogramCache, render_histograms
+from ingest import DATASET, read_listings
+from locality import get_locality_stats, top_localities
+from optimize import optimize
+from pipeline import Pipeline, Stage, StageProfiler
+from preprocessing import get_preprocessing_steps
+from segments import CORRELATIONS
+
+
+def get_spb_profile(df):
+    return get_distance_profile(df, bin_size=500, smooth=3, locality='санкт-петербург')
+
+
+def render_plots(df, directory):
+    histograms = HistogramCache(df)
+    for number, (columns, bins, ranges, ylims) in enumerate(CALLS):
+        render_histograms(histograms, columns, bins, ranges, ylims, columns,
+                          directory=directory, prefix=f'call{number}')
+
+
+def analysis(func):
+    """Этап анализа: результат не нужен, дальше передаётся тот же датафрейм"""
+    def stage(df, outputs):
+        func(df)
+        return df
+    return stage
+
+
+def step(func):
+    """Этап из функции предобработки df -> df"""
+    return lambda df, outputs: func(df)
+
+
+def get_stages(path, directory):
+    """Этапы конвейера project2.py с отдельным этапом на каждый шаг предобработки"""
+    stages = [Stage('load', lambda df, outputs: read_listings(path))]
+    # Шаг с таблицей названий - functools.partial: имя этапа берётся у обёрнутой функции
+    stages += [Stage(getattr(func, 'func', func).__name__, step(func)) for func in get_preprocessing_steps()]
+    stages += [
+        Stage('add_derived_features', step(add_derived_features)),
+        Stage('optimize', step(optimize)),
+        Stage('correlations', analysis(lambda df: correlate(df, 'last_price', list(CORRELATIONS.values())))),
+        Stage('locality_stats', analysis(lambda df: top_localities(get_locality_stats(df, quantiles=(0.1, 0.9))))),
+        Stage('distance_curve', analysis(get_spb_profile)),
+        Stage('plots', analysis(lambda df: render_plots(df, directory))),
+    ]
+    return stages
+
+
+def run_pipeline(path):
+    """Выполняется в дочернем процессе: время и память каждого этапа"""
+    profiler = StageProfiler()
+    with tempfile.TemporaryDirectory() as directory:
+        df = Pipeline(get_stages(path, directory), [profiler]).run()
+    return profiler.records, df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def count_rows(path):
+    with open(path, encoding='utf-8') as source:
+        return sum(1 for _ in source) - 1
+
+
+def run_scale(scale, directory, seed):
+    path = os.path.join(directory, f'synthetic-x{scale}.csv')
+    rows = count_rows(DATASET) * scale
+    start = time.perf_counter()
+    write_synthetic_listings(path, rows, seed)
+    generated = time.perf_counter() - start
+    try:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            stages, frame_mb = executor.submit(run_pipeline, path).result()
+    finally:
+        os.remove(path)
+    return {
+        'scale': scale,
+        'rows': rows,
+        'generate_seconds': generated,
+        'total_seconds': sum(stage['seconds'] for stage in stages),
+        'max_rss_mb': max(stage['max_rss_mb'] for stage in stages),
+        'frame_mb': frame_mb,
+        'stages': stages,
+    }
+
+
+def compare(runs, previous):
+    """Отношение времени этапов к прошлому запуску для совпадающих масштабов"""
+    old = {run['scale']: {stage['stage']: stage['seconds'] for stage in run['stages']} for run in previous['runs']}
+    for run in runs:
+        if run['scale'] not in old:
+            continue
+        print(f"x{run['scale']} против прошлого запуска:")
+        for stage in run['stages']:
+            before = old[run['scale']].get(stage['stage'])
+            if before:
+                print(f"  {stage['stage']:<28} {before:8.3f}s -> {stage['seconds']:8.3f}s  "
+                      f"{stage['seconds'] / before:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_pipeline.json')
+    parser.add_argument('--compare', help='JSON прошлого запуска')
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            run = run_scale(scale, directory, args.seed)
+            runs.append(run)
+            print(f"x{scale:<5} rows={run['rows']:<10} total {run['total_seconds']:8.2f}s  "
+                  f"peak rss {run['max_rss_mb']:8.1f}MB  frame {run['frame_mb']:7.1f}MB")
+            for stage in run['stages']:
+                print(f"  {stage['stage']:<28} {stage['seconds']:8.3f}s  rss {stage['max_rss_mb']:8.1f}MB")
+
+    result = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'seed': args.seed,
+        'runs': runs,
+    }
+    with open(args.output, 'w', encoding='utf-8') as target:
+        json.dump(result, target, indent=2, ensure_ascii=False)
+    print(f"Результаты: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as source:
+            compare(runs, json.load(source))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Оценка стоимости: обучение, пакетное предсказание и задержки локального HTTP-сервера модели.
+
+Точность - медианная относительная ошибка цены квартиры на отложенной
+пятой части архива, для сравнения - оценка одной медианой цены м²
+населённого пункта (без неё для населённых пунктов, которых нет в
+обучающей части). Пакетное предсказание замеряется на --rows
+объявлениях (размноженный архив). Сервер поднимается в этом же
+процессе на свободном порту, --clients потоков шлют по --requests
+запросов из --batch объявлений каждый. До замеров проверяются ответы
+сервера: пакет объявлений совпадает с пакетным предсказанием, пустой
+пакет даёт 200 и пустые списки.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_valuation --rows 1000000 --clients 1 4 16 --batch 1 100
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.common import measure, replicate
+from cache import load_clean_listings
+from valuation import ValuationModel, make_server
+
+REQUEST_COLUMNS = ['locality_name', 'total_area', 'rooms', 'cityCenters_nearest', 'ceiling_height',
+                   'floor', 'floors_total']
+
+
+def median_error(predicted, actual):
+    return float(np.nanmedian(np.abs(predicted / actual - 1)))
+
+
+def post(url, payload):
+    start = time.perf_counter()
+    request = urllib.request.Request(url, payload, {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def check_requests(url, model, test, records, batch=100):
+    """Ответы сервера: пакет из batch объявлений совпадает с model.predict, пустой пакет - 200 и пустые списки"""
+    expected = model.predict(test.head(batch))
+    status, found = fetch(url, {'listings': records[:batch]})
+    assert status == 200, status
+    for column in expected.columns:
+        values = np.array(found[column], dtype='float64')
+        assert np.allclose(values, expected[column].to_numpy(), equal_nan=True), column
+
+    status, found = fetch(url, {'listings': []})
+    assert status == 200 and found == {column: [] for column in expected.columns}, (status, found)
+    print(f"requests: batch of {batch} matches predict, empty batch returns empty lists")
+
+
+def fetch(url, body):
+    """Код ответа и разобранный JSON ответа на POST body"""
+    request = urllib.request.Request(url, json.dumps(body).encode('utf-8'), {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return response.status, json.loads(response.read())
+
+
+def load_test(url, payloads, clients, requests):
+    """Задержки запросов в секундах и общее время при clients параллельных клиентах"""
+    def client(number):
+        return [post(url, payloads[(number + sent) % len(payloads)]) for sent in range(requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = np.concatenate([np.array(found) for found in executor.map(client, range(clients))])
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 100])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    df = load_clean_listings()
+    train = df.sample(frac=0.8, random_state=0)
+    test = df.drop(train.index)
+    model, fit_time = measure(ValuationModel, train)
+    predicted = model.predict(test)['last_price'].to_numpy()
+    medians = (train['last_price'] / train['total_area']).groupby(train['locality_name'], observed=True).median()
+    baseline = test['locality_name'].map(medians).to_numpy(dtype='float64', na_value=np.nan) * test['total_area'].to_numpy()
+    actual = test['last_price'].to_numpy()
+    print(f"fit on {len(train)} rows {fit_time:.3f}s; median error on {len(test)} held-out rows: "
+          f"model {median_error(predicted, actual):.1%}, locality median {median_error(baseline, actual):.1%}")
+
+    listings = replicate(df, math.ceil(args.rows / len(df))).head(args.rows)
+    _, predict_time = measure(model.predict, listings)
+    print(f"predict {len(listings)} rows {predict_time:.3f}s ({len(listings) / predict_time:,.0f} rows/s)")
+
+    server = make_server(model, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/predict'
+    records = json.loads(test[REQUEST_COLUMNS].to_json(orient='records'))
+    try:
+        check_requests(url, model, test, records)
+        for batch in args.batch:
+            payloads = [json.dumps({'listings': records[start:start + batch]}).encode('utf-8')
+                        for start in range(0, min(len(records), batch * 100), batch)]
+            for clients in args.clients:
+                latencies, elapsed = load_test(url, payloads, clients, args.requests)
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+                print(f"  batch {batch:<5} clients {clients:<3} p50 {p50:7.2f}ms  p95 {p95:7.2f}ms  "
+                      f"p99 {p99:7.2f}ms  {len(latencies) / elapsed:8.0f} req/s")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
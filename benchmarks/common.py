@@ -0,0 +1,29 @@
+"""Общие функции для бенчмарков: загрузка и размножение датасета, замер времени"""
+
+import time
+
+import pandas as pd
+
+DATASET = 'datasets/real_estate_data.csv'
+
+
+def load_dataset(usecols=None):
+    """Загрузка исходного датасета так же, как в project2.py"""
+    df = pd.read_csv(DATASET, delimiter='\t', usecols=usecols)
+    if 'first_day_exposition' in df.columns:
+        df['first_day_exposition'] = pd.to_datetime(df['first_day_exposition'], format='%Y-%m-%dT%H:%M:%S')
+    return df
+
+
+def replicate(df, factor):
+    """Увеличение датасета в factor раз повторением строк"""
+    if factor == 1:
+        return df.copy()
+    return pd.concat([df] * factor, ignore_index=True)
+
+
+def measure(func, *args, **kwargs):
+    """Возвращает результат функции и время её выполнения в секундах"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
@@ -0,0 +1,91 @@
+"""Исходные реализации из project2.py, с которыми сравниваются новые версии"""
+
+import math
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+
+def get_median_days_exposition(df):
+    """Функция заполнения количества дней размещения медианным значением"""
+    years = pd.DatetimeIndex(df['first_day_exposition']).year.value_counts().index
+    monthes = pd.DatetimeIndex(df['first_day_exposition']).month.value_counts().index
+
+    for year in years:
+        for month in monthes:
+            median = df[(df['days_exposition'].notna()) & (pd.DatetimeIndex(df['first_day_exposition']).year == year) & (pd.DatetimeIndex(df['first_day_exposition']).month == month)]['days_exposition'].median()
+            if math.isnan(median):
+                median = df[(df['days_exposition'].notna()) & (pd.DatetimeIndex(df['first_day_exposition']).year == year)]['days_exposition'].median()
+            df.loc[((df['days_exposition'].isna()) & (pd.DatetimeIndex(df['first_day_exposition']).year == year) & (pd.DatetimeIndex(df['first_day_exposition']).month == month)), 'days_exposition'] = median
+
+    return df
+
+
+def get_median_living_area(df):
+    """Функция заполнения пропусков в жилой площади медианным значением"""
+    areas = df['total_area'].value_counts().index
+    for area in areas:
+        median = df[((df['living_area'].notna()) & (df['total_area'] == area))]['living_area'].median()
+        df.loc[((df['living_area'].isna()) & (df['total_area'] == area)), 'living_area'] = median
+
+    rooms = df['rooms'].value_counts().index
+    for room in rooms:
+        median = df[((df['living_area'].notna()) & (df['rooms'] == room))]['living_area'].median()
+        df.loc[((df['living_area'].isna()) & (df['rooms'] == room)), 'living_area'] = median
+
+    return df
+
+
+def get_median_kitchen_area(df):
+    df.sort_values(by='living_area', inplace=True)
+    df['quantile_areas'] = pd.qcut(df['living_area'], 10, labels=False)
+    areas = df['quantile_areas'].value_counts().index
+    for area in areas:
+        median = df[(df['kitchen_area'].notna()) & (df['quantile_areas'] == area)]['kitchen_area'].median()
+        df.loc[(df['kitchen_area'].isna()) & (df['quantile_areas'] == area), 'kitchen_area'] = median
+
+    return df
+
+
+def get_flat_floor (rows):
+    # В исходной версии rows[0] / rows[1]; позиционный доступ через [] у Series
+    # с текстовым индексом в новых pandas убран, поэтому здесь iloc
+    floor = rows.iloc[0]
+    floors_total = rows.iloc[1]
+    if floor == 1:
+        return 'первый'
+    elif floor == floors_total:
+        return 'последний'
+    return 'другой'
+
+
+def get_mean_square_price(df, row):
+    # В project2.py df брался из глобальной области видимости
+    return df[df['locality_name'] == row]['square_meter_price'].median().astype(int)
+
+
+def get_mean_per_m(spb_data, row):
+    # В project2.py spb_data брался из глобальной области видимости
+    return spb_data[spb_data['cityCenters_nearest'] == row]['last_price'].median().astype(int)
+
+
+def get_distance_curve(spb_data):
+    """Расчёт df_meters из project2.py"""
+    meters = spb_data['cityCenters_nearest'].value_counts().index
+    df_meters = pd.DataFrame({'meters': meters})
+    df_meters['city_price_mean'] = df_meters['meters'].apply(lambda row: get_mean_per_m(spb_data, row))
+    return df_meters
+
+
+def print_hist_plots(df, columns, bins, ranges, ylims, titles):
+    """Печать гистограмм с заданными параметрами"""
+    for i in range(0, len(columns)):
+        print (df[columns[i]].plot(
+            kind='hist', 
+            bins=bins[i], 
+            range=ranges[i],
+            ylim=ylims[i],
+            title=titles[i]
+        ))
+        plt.show()
+    return
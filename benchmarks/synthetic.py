@@ -0,0 +1,51 @@
+"""Синтетический архив объявлений со схемой и распределениями real_estate_data.csv.
+
+Строки выбираются из исходного датасета с возвращением, поэтому
+сохраняются совместные распределения (этаж не выше этажности, жилая
+площадь меньше общей) и доли пропусков. Цена, площади, расстояния, дата
+публикации и срок продажи слегка зашумляются, чтобы копии строк не
+совпадали и медианы по группам не вырождались.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ingest import DATASET, DATE_FORMAT, DELIMITER, read_listings
+
+AREA_COLUMNS = ['total_area', 'living_area', 'kitchen_area']
+DISTANCE_COLUMNS = ['airports_nearest', 'cityCenters_nearest', 'parks_nearest', 'ponds_nearest']
+
+
+def synthesize_listings(source, rows, seed=0):
+    """rows синтетических объявлений по образцу датафрейма source (read_listings)"""
+    rng = np.random.default_rng(seed)
+    df = source.iloc[rng.integers(0, len(source), rows)].reset_index(drop=True)
+
+    # Один множитель на все площади строки сохраняет их соотношения
+    scale = rng.lognormal(0, 0.05, rows)
+    for column in AREA_COLUMNS:
+        df[column] = (df[column] * scale).round(1)
+    df['last_price'] = (df['last_price'] * scale * rng.lognormal(0, 0.05, rows)).round(-3).astype('int64')
+    for column in DISTANCE_COLUMNS:
+        df[column] = (df[column] * rng.lognormal(0, 0.05, rows)).round().astype('float32')
+
+    dates = df['first_day_exposition'] + pd.to_timedelta(rng.integers(-15, 16, rows), unit='D')
+    df['first_day_exposition'] = dates.clip(source['first_day_exposition'].min(), source['first_day_exposition'].max())
+    df['days_exposition'] = (df['days_exposition'] * rng.lognormal(0, 0.1, rows)).round().clip(lower=1)
+    return df
+
+
+def write_synthetic_listings(path, rows, seed=0, chunksize=1_000_000, source=DATASET):
+    """Файл в формате real_estate_data.csv из rows синтетических строк; пишется частями"""
+    sample = read_listings(source)
+    for start in range(0, rows, chunksize):
+        chunk = synthesize_listings(sample, min(chunksize, rows - start), seed + start)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        chunk.to_csv(
+            path,
+            sep=DELIMITER,
+            date_format=DATE_FORMAT,
+            mode='w' if start == 0 else 'a',
+            header=start == 0,
+        )
+    return path
@@ -0,0 +1,104 @@
+"""Кэш очищенного датафрейма в колоночном формате Feather.
+
+Ключ кэша - хэш содержимого исходного файла и версия предобработки,
+поэтому изменение данных или кода предобработки даёт новый файл кэша.
+Хэш исходного файла запоминается в cache_dir/digests.json вместе с его
+размером и временем изменения: пока они те же, файл не перечитывается,
+и тёплый старт на многогигабайтных выгрузках не тратит секунды на sha256.
+Файлы пишутся без сжатия, чтобы читать их через memory map.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pyarrow as pa
+from pyarrow import feather
+
+from ingest import DATASET, read_listings
+from preprocessing import PREPROCESSING_VERSION, preprocess
+
+CACHE_DIR = '.cache'
+KEEP_VERSIONS = 3
+DIGESTS_FILE = 'digests.json'
+
+
+def file_digest(path, block_size=2 ** 20):
+    """sha256 содержимого файла, читаемого блоками"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_digest(path, cache_dir=CACHE_DIR):
+    """sha256 исходного файла; пересчитывается, только если изменились его размер или время изменения"""
+    stat = os.stat(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    index = Path(cache_dir) / DIGESTS_FILE
+    try:
+        with open(index, encoding='utf-8') as source:
+            digests = json.load(source)
+    except (FileNotFoundError, json.JSONDecodeError):
+        digests = {}
+
+    key = os.path.abspath(path)
+    known = digests.get(key)
+    if known is not None and known['signature'] == signature:
+        return known['digest']
+
+    digests[key] = {'signature': signature, 'digest': file_digest(path)}
+    index.parent.mkdir(parents=True, exist_ok=True)
+    partial = index.with_suffix('.tmp')
+    with open(partial, 'w', encoding='utf-8') as target:
+        json.dump(digests, target)
+    os.replace(partial, index)
+    return digests[key]['digest']
+
+
+def cache_path(path, version, cache_dir=CACHE_DIR):
+    """Путь к файлу кэша для исходного файла и версии предобработки"""
+    return Path(cache_dir) / f'{Path(path).stem}-{source_digest(path, cache_dir)[:16]}-v{version}.feather'
+
+
+def load_or_build(path, build, version, cache_dir=CACHE_DIR, keep=KEEP_VERSIONS):
+    """Датафрейм из кэша, а если его нет - build(path) с записью в кэш.
+
+    При попадании время изменения файла обновляется, при записи остаются
+    только keep последних использованных версий для этого исходного файла.
+    """
+    target = cache_path(path, version, cache_dir)
+    if target.exists():
+        os.utime(target)
+        return feather.read_table(target, memory_map=True).to_pandas()
+
+    df = build(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix('.tmp')
+    feather.write_feather(pa.Table.from_pandas(df), partial, compression='uncompressed')
+    os.replace(partial, target)
+    evict(path, cache_dir, keep)
+    return df
+
+
+def evict(path, cache_dir=CACHE_DIR, keep=KEEP_VERSIONS):
+    """Удаление всех версий кэша исходного файла, кроме keep последних использованных"""
+    versions = sorted(
+        Path(cache_dir).glob(f'{Path(path).stem}-*.feather'),
+        key=lambda cached: cached.stat().st_mtime,
+        reverse=True,
+    )
+    for stale in versions[keep:]:
+        stale.unlink()
+
+
+def load_clean_listings(path=DATASET, cache_dir=CACHE_DIR):
+    """Очищенный датафрейм объявлений (результат Шага 2) с кэшированием"""
+    return load_or_build(
+        path,
+        lambda source: preprocess(read_listings(source), cache_dir),
+        PREPROCESSING_VERSION,
+        cache_dir,
+    )
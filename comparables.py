@@ -0,0 +1,95 @@
+"""Поиск похожих объявлений (аналогов) в архиве через KD-деревья по населённым пунктам"""
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+FEATURES = ['cityCenters_nearest', 'airports_nearest', 'total_area', 'rooms']
+
+
+class ComparablesIndex:
+    """Индекс аналогов: отдельное KD-дерево на каждый населённый пункт.
+
+    Признаки нормируются медианой и межквартильным размахом архива, чтобы
+    метры до центра и квадратные метры площади весили сопоставимо. Строки
+    с пропуском хотя бы в одном признаке в индекс не попадают, поэтому для
+    населённых пунктов без картографических данных можно передать features
+    без расстояний.
+    """
+
+    def __init__(self, df, features=FEATURES, by='locality_name'):
+        self.features = list(features)
+        self.by = by
+        values = df[self.features].to_numpy(dtype='float64', na_value=np.nan)
+        self.center = np.nanmedian(values, axis=0)
+        q75, q25 = np.nanpercentile(values, [75, 25], axis=0)
+        self.scale = np.where(q75 > q25, q75 - q25, 1.0)
+
+        known = ~np.isnan(values).any(axis=1)
+        scaled = (values[known] - self.center) / self.scale
+        labels = df.index.to_numpy()[known]
+        self._trees = {
+            name: (cKDTree(scaled[positions]), labels[positions])
+            for name, positions in _positions_by(df[by].to_numpy()[known]).items()
+        }
+
+    def query(self, listings, k=10):
+        """k ближайших аналогов для каждого объявления из listings.
+
+        Возвращает таблицу: индекс объявления, индекс аналога в архиве и
+        расстояние в нормированных признаках, по возрастанию расстояния.
+        """
+        parts = []
+        for name, labels, points in self._groups(listings):
+            tree, archive = self._trees[name]
+            distances, positions = tree.query(points, k=min(k, tree.n))
+            distances = distances.reshape(len(points), -1)
+            positions = positions.reshape(len(points), -1)
+            parts.append(pd.DataFrame({
+                'listing': np.repeat(labels, positions.shape[1]),
+                'comparable': archive[positions.ravel()],
+                'distance': distances.ravel(),
+            }))
+        return self._concat(parts)
+
+    def query_radius(self, listings, radius):
+        """Все аналоги на нормированном расстоянии не больше radius"""
+        parts = []
+        for name, labels, points in self._groups(listings):
+            tree, archive = self._trees[name]
+            neighbours = tree.query_ball_point(points, radius, return_sorted=True)
+            counts = np.fromiter((len(found) for found in neighbours), dtype=np.int64, count=len(points))
+            if not counts.sum():
+                continue
+            positions = np.concatenate([np.asarray(found, dtype=np.int64) for found in neighbours])
+            listing = np.repeat(np.arange(len(points)), counts)
+            distances = np.linalg.norm(tree.data[positions] - points[listing], axis=1)
+            parts.append(pd.DataFrame({
+                'listing': labels[listing],
+                'comparable': archive[positions],
+                'distance': distances,
+            }))
+        return self._concat(parts)
+
+    def _groups(self, listings):
+        """Нормированные признаки объявлений, сгруппированные по населённым пунктам из индекса"""
+        values = listings[self.features].to_numpy(dtype='float64', na_value=np.nan)
+        scaled = (values - self.center) / self.scale
+        known = ~np.isnan(scaled).any(axis=1)
+        rows = np.flatnonzero(known)
+        labels = listings.index.to_numpy()
+        for name, positions in _positions_by(listings[self.by].to_numpy()[known]).items():
+            if name in self._trees:
+                positions = rows[positions]
+                yield name, labels[positions], scaled[positions]
+
+    @staticmethod
+    def _concat(parts):
+        if not parts:
+            return pd.DataFrame({'listing': [], 'comparable': [], 'distance': []})
+        return pd.concat(parts, ignore_index=True)
+
+
+def _positions_by(names):
+    """Позиции строк для каждого значения names"""
+    return pd.Series(np.arange(len(names))).groupby(names, sort=False).indices
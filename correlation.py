@@ -0,0 +1,91 @@
+"""Корреляция одного целевого столбца с набором признаков"""
+
+import numpy as np
+import pandas as pd
+
+
+def correlate(df, target, features=None, method='pearson', missing=(), rows=None):
+    """Корреляции target с каждым из features одним вектором, без полной матрицы df.corr().
+
+    features - по умолчанию все числовые столбцы, кроме target. Пропусками
+    считаются NaN, NA и значения-заглушки из missing (например, -999.99 в
+    старых выгрузках); для каждого признака берутся строки, где известны и
+    он, и target, как в Series.corr. method - 'pearson' или 'spearman'.
+    Категориальные признаки (например, floor_kind) коррелируются по кодам
+    категорий, без отдельного числового столбца в df. rows - булева маска
+    строк сегмента (например, центр города): строки выбираются в каждом
+    векторе, без копии df[rows].
+
+    Возвращает таблицу: признак, коэффициент корреляции, число наблюдений.
+    """
+    if features is None:
+        features = [name for name in df.select_dtypes('number').columns if name != target]
+    if method == 'pearson':
+        compute = _pearson
+    elif method == 'spearman':
+        compute = _spearman
+    else:
+        raise ValueError(f"Unknown correlation method: {method!r}")
+
+    # Признаки переводятся во float64 по одному: памяти нужно на несколько
+    # векторов длины df, а не на матрицу всех признаков
+    rows = None if rows is None else np.asarray(rows, dtype=bool)
+    goal = _to_float(df[target], missing, rows)
+    results = [compute(_to_float(df[name], missing, rows)[:, None], goal) for name in features]
+    coefficients = np.array([coefficient[0] for coefficient, _ in results], dtype='float64')
+    observations = np.array([count[0] for _, count in results], dtype='int64')
+
+    return pd.DataFrame({
+        'feature': features,
+        'correlation': coefficients,
+        'observations': observations,
+    })
+
+
+def _to_float(series, missing, rows=None):
+    """Значения series (строки rows) во float64 с NaN на месте пропусков и заглушек missing"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.cat.codes.where(series.notna())
+    # Выбор строк маской уже копирует вектор, иначе копия нужна для замены заглушек
+    values = series.to_numpy(dtype='float64', na_value=np.nan, copy=rows is None)
+    if rows is not None:
+        values = values[rows]
+    # Заглушка могла храниться во float32, поэтому сравнение с допуском
+    for sentinel in missing:
+        values[np.isclose(values, sentinel, rtol=0, atol=1e-3)] = np.nan
+    return values
+
+
+def _pearson(values, goal):
+    """Корреляция Пирсона столбца values с goal по попарно известным строкам.
+
+    correlate и _spearman передают по одному признаку (values формы (n, 1)),
+    поэтому временные массивы - несколько векторов длины goal. Данные
+    центрируются по попарно известным строкам, затем считаются суммы.
+    """
+    valid = ~np.isnan(values) & ~np.isnan(goal)[:, None]
+    observations = valid.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = observations.astype('float64')
+        x = np.where(valid, values, 0.0)
+        y = np.where(valid, goal[:, None], 0.0)
+        x = np.where(valid, x - x.sum(axis=0) / n, 0.0)
+        y = np.where(valid, y - y.sum(axis=0) / n, 0.0)
+        coefficients = (x * y).sum(axis=0) / np.sqrt((x * x).sum(axis=0) * (y * y).sum(axis=0))
+    coefficients[observations < 2] = np.nan
+    return coefficients, observations
+
+
+def _spearman(values, goal):
+    """Корреляция Спирмена: Пирсон по рангам внутри попарно известных строк"""
+    coefficients = np.full(values.shape[1], np.nan)
+    observations = np.zeros(values.shape[1], dtype='int64')
+    known_goal = ~np.isnan(goal)
+    for column in range(values.shape[1]):
+        valid = known_goal & ~np.isnan(values[:, column])
+        ranks_x = pd.Series(values[valid, column]).rank().to_numpy()[:, None]
+        ranks_y = pd.Series(goal[valid]).rank().to_numpy()
+        coefficient, count = _pearson(ranks_x, ranks_y)
+        coefficients[column], observations[column] = coefficient[0], count[0]
+    return coefficients, observations
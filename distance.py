@@ -0,0 +1,75 @@
+"""Зависимость цены от расстояния до центра по интервалам расстояний"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from histograms import PLOTS_DIR
+from imputers import get_quantile_buckets
+
+
+def get_distance_profile(df, bin_size=1000, q=None, smooth=None, locality=None,
+                         column='last_price', distance='cityCenters_nearest'):
+    """Медиана column по интервалам расстояния distance, за один groupby.
+
+    bin_size - ширина интервала в метрах; если задан q, интервалы строятся
+    по квантилям расстояния, по q объявлений примерно поровну в каждом.
+    smooth - ширина окна скользящей медианы по соседним интервалам; пустые
+    интервалы в окне не учитываются, но и не пропускаются.
+    locality - населённый пункт; по умолчанию берутся все строки df.
+    Строки без расстояния (пропуск или отрицательная заглушка) пропускаются.
+
+    Возвращает таблицу по интервалам: начало и конец интервала в метрах,
+    число объявлений, медиана и, если задан smooth, сглаженная медиана.
+    """
+    mask = df[distance].to_numpy() >= 0
+    if locality is not None:
+        mask &= (df['locality_name'] == locality).to_numpy()
+    meters = df[distance][mask]
+    values = df[column][mask]
+
+    if q is None:
+        bins = pd.Series(np.floor_divide(meters.to_numpy(), bin_size).astype(np.int64), index=meters.index)
+    else:
+        bins = get_quantile_buckets(meters, q)
+    profile = values.groupby(bins).agg(['count', 'median'])
+    if smooth:
+        # Окно идёт по номерам интервалов, а не по позициям строк: пустые
+        # интервалы остаются NaN, и окно не сшивает через них дальних соседей
+        bins_range = np.arange(profile.index.min(), profile.index.max() + 1)
+        full = profile['median'].reindex(bins_range)
+        profile['smoothed'] = full.rolling(smooth, center=True, min_periods=1).median().reindex(profile.index)
+    if q is None:
+        profile.insert(0, 'distance_to', (profile.index + 1) * bin_size)
+        profile.index = profile.index * bin_size
+    else:
+        limits = meters.groupby(bins).agg(['min', 'max'])
+        profile.insert(0, 'distance_to', limits['max'])
+        profile.index = limits['min']
+    profile.index.name = 'distance_from'
+    return profile
+
+
+def render_distance_profile(profile, column='median', title=None, directory=PLOTS_DIR,
+                            name='distance_profile', formats=('png',)):
+    """Точечный график column профиля get_distance_profile по началу интервала в файлы directory/<name>.<формат>.
+
+    Рисование идёт через Figure без pyplot, как в histograms.py. Возвращает
+    пути сохранённых файлов.
+    """
+    os.makedirs(directory, exist_ok=True)
+    figure = Figure()
+    axes = figure.add_subplot()
+    axes.scatter(profile.index, profile[column])
+    axes.set_xlabel(profile.index.name)
+    axes.set_ylabel(column)
+    if title is not None:
+        axes.set_title(title)
+    paths = []
+    for extension in formats:
+        path = os.path.join(directory, f'{name}.{extension}')
+        figure.savefig(path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,54 @@
+"""Расчёт производных признаков объявлений (Шаг 3)"""
+
+import numpy as np
+import pandas as pd
+
+# Порядок категорий совпадает с алфавитным, поэтому cat.codes те же,
+# что давал .astype('category') у строкового столбца
+FLOOR_KINDS = ['другой', 'первый', 'последний']
+
+
+def get_floor_kind(floor, floors_total):
+    """Этаж квартиры: первый, последний или другой - категориальная Series"""
+    codes = np.select(
+        [floor.to_numpy() == 1, floor.to_numpy() == floors_total.to_numpy()],
+        [FLOOR_KINDS.index('первый'), FLOOR_KINDS.index('последний')],
+        default=FLOOR_KINDS.index('другой'),
+    ).astype('int8')
+    return pd.Series(pd.Categorical.from_codes(codes, categories=FLOOR_KINDS), index=floor.index)
+
+
+def add_square_meter_price(df):
+    """Цена квадратного метра: last_price / total_area"""
+    df['square_meter_price'] = df['last_price'] / df['total_area']
+    return df
+
+
+def add_exposition_dates(df):
+    """День недели, месяц и год публикации объявления"""
+    dates = df['first_day_exposition'].dt
+    df['day_exposition'] = dates.weekday
+    df['month_exposition'] = dates.month
+    df['year_exposition'] = dates.year
+    return df
+
+
+def add_floor_kind(df):
+    """Категория этажа квартиры"""
+    df['floor_kind'] = get_floor_kind(df['floor'], df['floors_total'])
+    return df
+
+
+def add_area_ratios(df):
+    """Соотношения жилой площади и площади кухни к общей площади"""
+    df['living_to_total_area'] = df['living_area'] / df['total_area']
+    df['kitchen_to_total_area'] = df['kitchen_area'] / df['total_area']
+    return df
+
+
+def add_derived_features(df):
+    """Все производные признаки Шага 3"""
+    df = add_square_meter_price(df)
+    df = add_exposition_dates(df)
+    df = add_floor_kind(df)
+    return add_area_ratios(df)
@@ -0,0 +1,80 @@
+"""Гистограммы без интерактивного окна: частоты через np.histogram, отрисовка в файлы.
+
+Частоты считаются один раз на (столбец, bins, range) и кэшируются, а
+matplotlib получает уже готовые столбики и не пересчитывает их по сырым
+данным. Рисование идёт через Figure без pyplot, поэтому работает без
+дисплея (например, в cron) и не копит открытые окна.
+"""
+
+import os
+
+import numpy as np
+from matplotlib.figure import Figure
+
+PLOTS_DIR = 'plots'
+
+
+class HistogramCache:
+    """Частоты гистограмм по столбцам df с кэшем по (столбец, bins, range).
+
+    rows - булева маска строк сегмента: строки выбираются в каждом
+    столбце, без копии df[rows].
+    """
+
+    def __init__(self, df, rows=None):
+        self.df = df
+        self.rows = None if rows is None else np.asarray(rows, dtype=bool)
+        self._values = {}
+        self._counts = {}
+
+    def get(self, column, bins, range=None):
+        """Частоты и границы интервалов, как у np.histogram; пропуски не учитываются"""
+        key = (column, bins, range)
+        if key not in self._counts:
+            self._counts[key] = np.histogram(self._finite(column), bins=bins, range=range)
+        return self._counts[key]
+
+    def _finite(self, column):
+        if column not in self._values:
+            values = self.df[column].to_numpy()
+            # Целые столбцы берутся без копии. Дробные считаются во float64:
+            # во float32 значения на границах интервалов попадают в другие столбики
+            if values.dtype.kind not in 'iu':
+                values = self.df[column].to_numpy(dtype='float64', na_value=np.nan)
+                known = np.isfinite(values)
+                values = values[known if self.rows is None else known & self.rows]
+            elif self.rows is not None:
+                values = values[self.rows]
+            self._values[column] = values
+        return self._values[column]
+
+
+def render_histograms(histograms, columns, bins, ranges, ylims, titles,
+                      directory=PLOTS_DIR, prefix='hist', formats=('png',)):
+    """Отрисовка гистограмм из кэша в файлы directory/<prefix>_<столбец>_<bins>_<range>.<формат>.
+
+    Параметры списками, как у print_hist_plots в project2.py. Диапазон
+    входит в имя файла, поэтому гистограммы одного столбца с разными
+    range не перезаписывают друг друга. Возвращает пути сохранённых файлов.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for column, column_bins, column_range, ylim, title in zip(columns, bins, ranges, ylims, titles):
+        counts, edges = histograms.get(column, column_bins, column_range)
+        figure = Figure()
+        axes = figure.add_subplot()
+        axes.stairs(counts, edges, fill=True)
+        axes.set_title(title)
+        axes.set_ylabel('Frequency')
+        if ylim is not None:
+            axes.set_ylim(ylim)
+        for extension in formats:
+            path = os.path.join(directory, f'{prefix}_{column}_{column_bins}_{_range_label(column_range)}.{extension}')
+            figure.savefig(path)
+            paths.append(path)
+    return paths
+
+
+def _range_label(range):
+    """Диапазон гистограммы для имени файла: 'all' или '<от>-<до>'"""
+    return 'all' if range is None else '-'.join(str(limit) for limit in range)
@@ -0,0 +1,106 @@
+"""Заполнение пропусков медианными значениями по группам"""
+
+import numpy as np
+import pandas as pd
+
+
+def fill_hierarchical_median(df, column, levels):
+    """Заполнение пропусков медианой по иерархии групп.
+
+    levels - список ключей группировки от самого детального уровня к самому
+    общему, например [[year, month], [year]]. Ключом может быть имя столбца
+    или Series, выровненная по индексу df. Медианы каждого уровня считаются
+    за один проход groupby только по известным значениям столбца; пропуски,
+    для которых на уровне не нашлось медианы, заполняются следующим уровнем.
+    """
+    observed = df[column]
+    filled = observed
+    for keys in levels:
+        if not filled.isna().any():
+            break
+        medians = observed.groupby(_resolve_keys(df, keys)).transform('median')
+        filled = filled.fillna(medians)
+
+    df[column] = filled
+    return df
+
+
+def fill_cascade_median(df, column, levels):
+    """Каскадное заполнение пропусков медианой по группам.
+
+    levels - упорядоченный список ключей группировки, например
+    [['total_area'], ['rooms']]. В отличие от fill_hierarchical_median,
+    медианы каждого следующего уровня считаются по уже заполненному на
+    предыдущих уровнях столбцу. На каждый уровень - один проход groupby.
+
+    Возвращает df и таблицу статистики по уровням: число групп, сколько
+    пропусков заполнено на уровне и сколько осталось после него.
+    """
+    filled = df[column]
+    stats = []
+    for keys in levels:
+        keys = _resolve_keys(df, keys)
+        missing_before = int(filled.isna().sum())
+        grouped = filled.groupby(keys)
+        filled = filled.fillna(grouped.transform('median'))
+        missing_after = int(filled.isna().sum())
+        stats.append({
+            'level': ', '.join(str(key.name) for key in keys),
+            'groups': grouped.ngroups,
+            'filled': missing_before - missing_after,
+            'remaining': missing_after,
+        })
+
+    df[column] = filled
+    return df, pd.DataFrame(stats).set_index('level')
+
+
+def fill_quantile_bucket_median(df, column, by, q=10, sample_size=None, random_state=0):
+    """Заполнение пропусков медианой по квантильным корзинам другого столбца.
+
+    Значения столбца by делятся на q корзин с границами по квантилям (как
+    в pd.qcut), пропуски column заполняются медианой своей корзины.
+    Границы считаются один раз, корзины назначаются через searchsorted,
+    медианы - одним transform. Датафрейм не сортируется, не копируется и
+    не получает временных столбцов.
+
+    sample_size - если задан, границы считаются приближённо по случайной
+    выборке такого размера; для больших архивов это заметно быстрее, а
+    корзины почти не меняются.
+    """
+    buckets = get_quantile_buckets(df[by], q, sample_size, random_state)
+    medians = df[column].groupby(buckets).transform('median')
+    df[column] = df[column].fillna(medians)
+    return df
+
+
+def get_quantile_buckets(values, q=10, sample_size=None, random_state=0):
+    """Номера квантильных корзин (0..q-1) для значений Series, NaN - без корзины"""
+    return assign_buckets(values, get_quantile_edges(values, q, sample_size, random_state))
+
+
+def get_quantile_edges(values, q=10, sample_size=None, random_state=0):
+    """Границы q квантильных корзин, по всем значениям или по случайной выборке"""
+    source = values.dropna()
+    if sample_size is not None and len(source) > sample_size:
+        source = source.sample(sample_size, random_state=random_state)
+    edges = source.quantile(np.linspace(0, 1, q + 1)).to_numpy()
+    if len(np.unique(edges)) < len(edges):
+        raise ValueError(f"Bin edges must be unique: {edges!r}")
+    return edges
+
+
+def assign_buckets(values, edges):
+    """Номера корзин по готовым границам; значения вне границ попадают в крайние корзины"""
+    # Корзины закрыты справа, а нижняя граница входит в первую корзину - как в pd.qcut
+    codes = np.searchsorted(edges, values.to_numpy(), side='left') - 1
+    codes = np.clip(codes, 0, len(edges) - 2).astype(float)
+    codes[values.isna().to_numpy()] = np.nan
+    return pd.Series(codes, index=values.index, name=f'{values.name}_bucket')
+
+
+def _resolve_keys(df, keys):
+    """Превращает имена столбцов в Series, чтобы группировать Series по ним"""
+    if isinstance(keys, (str, pd.Series)):
+        keys = [keys]
+    return [df[key] if isinstance(key, str) else key for key in keys]
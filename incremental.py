@@ -0,0 +1,171 @@
+"""Инкрементальная предобработка: новые объявления дозаполняются по накопленной статистике.
+
+Вместо пересчёта медиан по всему архиву для каждой группы хранятся
+счётчики наблюдённых значений: отсортированные уникальные значения и
+число повторов каждого. Новая пачка объявлений сливается со счётчиками
+затронутых групп, медиана группы находится по накопленным количествам:
+обработка пачки зависит от её размера и числа различных значений в
+группах, но не от числа объявлений в архиве.
+
+Результат совпадает с полным пересчётом не точно: уже обработанные строки
+архива не перезаполняются, а границы децилей жилой площади фиксируются
+при первом расчёте. Расхождение с полным пересчётом проверяет
+benchmarks/bench_incremental.py.
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from imputers import assign_buckets, get_quantile_edges
+from locality_names import NAMES_DIR, canonicalize_locality_name
+from preprocessing import clean_locality_name, fill_balcony, fill_is_apartment, fill_locality_name
+
+
+class MedianState:
+    """Счётчики наблюдённых значений по группам: отсортированные уникальные значения и их количества.
+
+    Значения архива сильно повторяются (целые дни, цены в круглых
+    суммах, высоты с точностью до сантиметра), поэтому размер состояния
+    определяется числом различных значений, а не числом объявлений, и
+    слияние пачки с группой стоит O(различных значений + пачки).
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def update(self, values, keys):
+        """Добавление известных значений values в группы keys (список Series)"""
+        known = values.notna()
+        observed = values[known]
+        if observed.empty:
+            return
+        observed_values = observed.to_numpy(dtype='float64')
+        for key, positions in observed.groupby([key[known] for key in keys], observed=True).indices.items():
+            new, counts = np.unique(observed_values[positions], return_counts=True)
+            current = self.values.get(key)
+            if current is not None:
+                new, inverse = np.unique(np.concatenate([current[0], new]), return_inverse=True)
+                counts = np.bincount(inverse, weights=np.concatenate([current[1], counts])).astype(np.int64)
+            self.values[key] = (new, counts)
+
+    def group_medians(self):
+        """Медиана каждой группы: Series с ключами групп в индексе"""
+        return pd.Series({key: _counted_median(*current) for key, current in self.values.items()}).sort_index()
+
+    def medians(self, keys):
+        """Медиана группы для каждой строки; NaN, если у группы нет значений"""
+        groups = keys[0].groupby(keys, observed=True, dropna=False).indices
+        result = np.full(len(keys[0]), np.nan)
+        for key, positions in groups.items():
+            current = self.values.get(key)
+            if current is not None:
+                result[positions] = _counted_median(*current)
+        return pd.Series(result, index=keys[0].index)
+
+
+class IncrementalPreprocessor:
+    """Предобработка (Шаг 2) с сохраняемой статистикой для дозаполнения новых пачек.
+
+    names_dir - каталог таблицы канонических названий населённых пунктов,
+    как у preprocessing.preprocess.
+    """
+
+    def __init__(self, names_dir=NAMES_DIR):
+        self.names_dir = names_dir
+        self.days_by_month = MedianState()
+        self.days_by_year = MedianState()
+        self.living_by_area = MedianState()
+        self.living_by_rooms = MedianState()
+        self.kitchen_by_decile = MedianState()
+        self.ceiling = MedianState()
+        self.living_edges = None
+        self.floors_sum = 0.0
+        self.floors_count = 0
+        self.last_price = MedianState()
+
+    def fit(self, df):
+        """Предобработка архива с накоплением статистики"""
+        return self.update(df)
+
+    def update(self, df):
+        """Добавление статистики пачки и заполнение её пропусков"""
+        df = fill_balcony(fill_is_apartment(df))
+        df = self._fill_days_exposition(df)
+        df = self._fill_living_area(df)
+        df = self._fill_kitchen_area(df)
+        df = self._fill_floors_total(df)
+        df = self._fill_ceiling_height(df)
+        df = fill_locality_name(df)
+        df = self._clean_last_price(df)
+        return canonicalize_locality_name(clean_locality_name(df), self.names_dir)
+
+    def save(self, path):
+        """Сохранение накопленной статистики между запусками"""
+        with open(path, 'wb') as target:
+            pickle.dump(self, target)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as source:
+            return pickle.load(source)
+
+    def _fill_days_exposition(self, df):
+        dates = df['first_day_exposition'].dt
+        by_month = [dates.year, dates.month]
+        by_year = [dates.year]
+        self.days_by_month.update(df['days_exposition'], by_month)
+        self.days_by_year.update(df['days_exposition'], by_year)
+        filled = df['days_exposition'].fillna(self.days_by_month.medians(by_month))
+        df['days_exposition'] = filled.fillna(self.days_by_year.medians(by_year))
+        return df
+
+    def _fill_living_area(self, df):
+        by_area = [df['total_area']]
+        by_rooms = [df['rooms']]
+        self.living_by_area.update(df['living_area'], by_area)
+        filled = df['living_area'].fillna(self.living_by_area.medians(by_area))
+        # Второй уровень каскада, как и в полном расчёте, видит значения первого
+        self.living_by_rooms.update(filled, by_rooms)
+        df['living_area'] = filled.fillna(self.living_by_rooms.medians(by_rooms))
+        return df
+
+    def _fill_kitchen_area(self, df):
+        if self.living_edges is None:
+            self.living_edges = get_quantile_edges(df['living_area'], q=10)
+        buckets = [assign_buckets(df['living_area'], self.living_edges)]
+        self.kitchen_by_decile.update(df['kitchen_area'], buckets)
+        df['kitchen_area'] = df['kitchen_area'].fillna(self.kitchen_by_decile.medians(buckets))
+        return df
+
+    def _fill_floors_total(self, df):
+        self.floors_sum += float(df['floors_total'].sum())
+        self.floors_count += int(df['floors_total'].count())
+        # Пока в пачках не было ни одного значения, среднего нет: пропуски остаются NaN, как в MedianState.medians
+        if self.floors_count:
+            df['floors_total'] = df['floors_total'].fillna(self.floors_sum / self.floors_count).astype(int)
+        return df
+
+    def _fill_ceiling_height(self, df):
+        everything = [pd.Series(0, index=df.index)]
+        self.ceiling.update(df['ceiling_height'], everything)
+        df['ceiling_height'] = df['ceiling_height'].fillna(self.ceiling.medians(everything))
+        return df
+
+    def _clean_last_price(self, df):
+        # Неположительные цены заменяются медианой всего архива, а не пачки
+        everything = [pd.Series(0, index=df.index)]
+        self.last_price.update(df['last_price'], everything)
+        df['last_pice'] = df['last_price'].astype(int)
+        invalid = df['last_pice'] <= 0
+        df.loc[invalid, 'last_pice'] = self.last_price.medians(everything)[invalid].astype(int)
+        return df
+
+
+def _counted_median(values, counts):
+    """Медиана по отсортированным уникальным значениям и их количествам"""
+    total = int(counts.sum())
+    cumulative = np.cumsum(counts)
+    lower, upper = np.searchsorted(cumulative, [(total + 1) // 2, total // 2 + 1])
+    return (values[lower] + values[upper]) / 2
@@ -0,0 +1,138 @@
+"""Загрузка архива объявлений с явной схемой и потоковое чтение по частям"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DATASET = 'datasets/real_estate_data.csv'
+DELIMITER = '\t'
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+# Первый столбец файла - сохранённый индекс без заголовка
+INDEX_COLUMN = 'Unnamed: 0'
+
+# Целочисленные значения без пропусков читаются сразу в узкие int,
+# целочисленные значения с пропусками - в float32 (до 2**24 он точен),
+# дробные площади и высоты остаются float64, чтобы медианы не менялись
+SCHEMA = {
+    'total_images': 'int16',
+    'last_price': 'int64',
+    'total_area': 'float64',
+    'rooms': 'int8',
+    'ceiling_height': 'float64',
+    'floors_total': 'float32',
+    'living_area': 'float64',
+    'floor': 'int8',
+    'is_apartment': 'boolean',
+    'studio': 'bool',
+    'open_plan': 'bool',
+    'kitchen_area': 'float64',
+    'balcony': 'float32',
+    'locality_name': 'category',
+    'airports_nearest': 'float32',
+    'cityCenters_nearest': 'float32',
+    'parks_around3000': 'float32',
+    'parks_nearest': 'float32',
+    'ponds_around3000': 'float32',
+    'ponds_nearest': 'float32',
+    'days_exposition': 'float64',
+}
+DATE_COLUMNS = ['first_day_exposition']
+# Целые столбцы парсер читает во float64, а к типу SCHEMA они приводятся
+# после разбора (cast_integers): пустая ячейка или дробная цена в новой
+# выгрузке дают ошибку с именем столбца и номерами строк, а не ValueError
+# парсера где-то в середине файла. Целые до 2**53 во float64 точны
+INTEGER_COLUMNS = {name: dtype for name, dtype in SCHEMA.items() if pd.api.types.is_integer_dtype(dtype)}
+
+
+def _read_options(usecols):
+    """Общие параметры read_csv для полной и потоковой загрузки"""
+    columns = None if usecols is None else set(usecols)
+    return {
+        'delimiter': DELIMITER,
+        'index_col': 0,
+        'usecols': None if usecols is None else [INDEX_COLUMN, *usecols],
+        'dtype': {
+            name: 'float64' if name in INTEGER_COLUMNS else dtype
+            for name, dtype in SCHEMA.items() if columns is None or name in columns
+        },
+        'parse_dates': [name for name in DATE_COLUMNS if columns is None or name in columns],
+        'date_format': DATE_FORMAT,
+    }
+
+
+def cast_integers(df, first_row=0):
+    """Проверка и приведение целых столбцов SCHEMA, прочитанных во float64, к их типам.
+
+    first_row - номер первой строки df среди строк данных файла (с нуля),
+    чтобы ошибка указывала строки файла, а не части.
+    """
+    for name, dtype in INTEGER_COLUMNS.items():
+        if name not in df.columns:
+            continue
+        values = df[name].to_numpy()
+        limits = np.iinfo(dtype)
+        with np.errstate(invalid='ignore'):
+            invalid = ~np.isfinite(values) | (values != np.round(values)) | (values < limits.min) | (values > limits.max)
+        if invalid.any():
+            rows = first_row + np.flatnonzero(invalid)
+            raise ValueError(
+                f"{name}: {len(rows)} empty, fractional or out-of-range values for {dtype} "
+                f"in data rows {rows[0]}-{rows[-1]} (first: {values[rows[0] - first_row]!r})"
+            )
+        df[name] = values.astype(dtype)
+    return df
+
+
+def read_listings(path=DATASET, usecols=None):
+    """Загрузка всего архива в типизированный датафрейм"""
+    return cast_integers(pd.read_csv(path, **_read_options(usecols)))
+
+
+def iter_listings(path=DATASET, chunksize=100_000, usecols=None, steps=()):
+    """Генератор типизированных частей архива.
+
+    steps - функции chunk -> chunk, которые применяются к каждой части по
+    очереди, так что предобработка идёт по мере чтения и в памяти
+    одновременно находится только одна часть.
+    """
+    first_row = 0
+    with pd.read_csv(path, chunksize=chunksize, **_read_options(usecols)) as reader:
+        for chunk in reader:
+            chunk = cast_integers(chunk, first_row)
+            first_row += len(chunk)
+            for step in steps:
+                chunk = step(chunk)
+            yield chunk
+
+
+def concat_chunks(chunks):
+    """Склейка частей с объединением категорий, чтобы category не стал object"""
+    chunks = list(chunks)
+    categorical = [
+        name for name, dtype in chunks[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)
+    ]
+    for name in categorical:
+        categories = union_categoricals([chunk[name] for chunk in chunks], sort_categories=True).categories
+        for chunk in chunks:
+            chunk[name] = chunk[name].cat.set_categories(categories)
+    return pd.concat(chunks)
+
+
+def aggregate_chunks(chunks, by, column):
+    """Потоковая агрегация column по группам by: count, sum, min, max и mean.
+
+    Частичные агрегаты каждой части сразу объединяются с накопленными,
+    поэтому результат совпадает с агрегацией всего архива, а в памяти
+    держится только одна часть и таблица групп.
+    """
+    total = None
+    for chunk in chunks:
+        partial = chunk.groupby(by, observed=True)[column].agg(['count', 'sum', 'min', 'max'])
+        if total is not None:
+            partial = pd.concat([total, partial]).groupby(level=list(range(partial.index.nlevels))).agg(
+                {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'}
+            )
+        total = partial
+
+    total['mean'] = total['sum'] / total['count']
+    return total
@@ -5,6 +5,8 @@ source env/bin/activate
 #install packages
 pip3 install pandas
 pip3 install matplotlib
+pip3 install pyarrow
+pip3 install scipy
 pip3 install jupyterlab
 
 #run notebook
@@ -0,0 +1,105 @@
+"""Ленивый бэкенд анализа (Шаг 4) поверх кэшированного Feather-файла через pyarrow.dataset.
+
+Каждый анализ - один запрос к файлу очищенных объявлений: фильтр
+(населённый пункт, наличие расстояния) проталкивается в сканирование,
+читаются только нужные столбцы, производные признаки считаются
+выражениями Arrow при чтении, а сканирование идёт в нескольких потоках.
+В pandas переходит уже отфильтрованная узкая таблица, и к ней
+применяются те же функции, что и в project2.py, поэтому результаты
+совпадают с расчётом по полному датафрейму.
+
+Polars и DuckDB в зависимостях проекта нет, а pyarrow уже нужен кэшу.
+"""
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from cache import CACHE_DIR, cache_path, load_clean_listings
+from distance import get_distance_profile
+from features import add_floor_kind
+from ingest import DATASET
+from locality import get_locality_stats
+from preprocessing import PREPROCESSING_VERSION
+from segments import CORRELATIONS, MEDIANS, SegmentComparison
+
+# Производные признаки Шага 3, которые считаются выражениями при чтении
+DERIVED = {
+    'square_meter_price': pc.divide(pc.field('last_price').cast(pa.float64()), pc.field('total_area')),
+    'day_exposition': pc.day_of_week(pc.field('first_day_exposition')),
+    'month_exposition': pc.month(pc.field('first_day_exposition')),
+    'year_exposition': pc.year(pc.field('first_day_exposition')),
+}
+# floor_kind считается после чтения из этих столбцов
+FLOOR_KIND_SOURCES = ['floor', 'floors_total']
+
+SPB = 'санкт-петербург'
+
+
+class LazyListings:
+    """Запросы анализа к Feather-файлу очищенных объявлений"""
+
+    def __init__(self, path):
+        self.dataset = ds.dataset(path, format='ipc')
+
+    @classmethod
+    def from_cache(cls, path=DATASET, cache_dir=CACHE_DIR):
+        """Запросы к кэшу очищенного датафрейма для path; кэш строится, если его нет"""
+        target = cache_path(path, PREPROCESSING_VERSION, cache_dir)
+        if not target.exists():
+            load_clean_listings(path, cache_dir)
+        return cls(target)
+
+    def scan(self, columns, where=None):
+        """Датафрейм из столбцов columns (в том числе производных) для строк, где выполнено where"""
+        return self._to_pandas(self._read(columns, where), columns)
+
+    def _read(self, columns, where=None):
+        projection = {}
+        for name in columns:
+            if name == 'floor_kind':
+                projection.update({source: pc.field(source) for source in FLOOR_KIND_SOURCES})
+            else:
+                projection[name] = DERIVED.get(name, pc.field(name))
+        return self.dataset.to_table(columns=projection, filter=where, use_threads=True)
+
+    @staticmethod
+    def _to_pandas(table, columns):
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        if 'floor_kind' in columns:
+            df = add_floor_kind(df).drop(columns=[name for name in FLOOR_KIND_SOURCES if name not in columns])
+        return df
+
+    def locality_stats(self, quantiles=(), column='square_meter_price', by='locality_name'):
+        """То же, что locality.get_locality_stats по всему архиву"""
+        return get_locality_stats(self.scan([by, column]), quantiles, column, by)
+
+    def distance_profile(self, bin_size=1000, q=None, smooth=None, locality=None,
+                         column='last_price', distance='cityCenters_nearest'):
+        """То же, что distance.get_distance_profile; фильтры выполняются при чтении"""
+        where = pc.field(distance) >= 0
+        if locality is not None:
+            where &= pc.field('locality_name') == locality
+        return get_distance_profile(self.scan([column, distance], where), bin_size, q, smooth,
+                                    column=column, distance=distance)
+
+    def segments(self, segments, target='last_price', correlations=CORRELATIONS, medians=MEDIANS):
+        """SegmentComparison, где сегменты заданы фильтрами Arrow: {имя: выражение}.
+
+        Каждый сегмент - отдельный запрос: в памяти одновременно только
+        строки одного сегмента и только нужные столбцы.
+        """
+        comparison = SegmentComparison(None, target, correlations, medians)
+        columns = list(dict.fromkeys([target, *correlations.values(), *medians.values()]))
+        for name, where in segments.items():
+            comparison.add_segment(name, self.scan(columns, where))
+        return comparison
+
+
+def spb_segments(center=7500):
+    """Фильтры сегментов из project2.py: весь Санкт-Петербург и его центр"""
+    spb = (pc.field('locality_name') == SPB) & pc.field('cityCenters_nearest').is_valid()
+    return {
+        'spb_total': spb,
+        'spb_center': spb & (pc.field('cityCenters_nearest') < center),
+    }
@@ -0,0 +1,127 @@
+"""Ликвидность: время продажи с учётом ещё не снятых объявлений (кривые Каплана-Мейера).
+
+Пропуск в days_exposition значит, что объявление на момент выгрузки ещё
+висит: известно только, что квартира не продалась за время от публикации
+до выгрузки. Заполнение таких пропусков медианами (Шаг 2) выдаёт их за
+продажи и сдвигает средний и медианный срок. Здесь они цензурированы
+справа: до своего срока считаются непроданными, а продажами не считаются.
+Маску пропусков нужно взять до заполнения, у очищенного датафрейма её
+уже нет.
+
+Кривые всех сегментов считаются за одну сортировку по (сегмент, срок):
+число продаж и снятий с наблюдения на каждом сроке - суммы по отрезкам
+сортированного массива, число объявлений под риском - расстояние до
+конца сегмента, а доля непроданных - накопленное произведение внутри
+сегмента.
+"""
+
+import numpy as np
+import pandas as pd
+
+SEGMENTS = ['locality_name', 'rooms', 'floor_kind']
+
+
+def get_durations(df, censored, snapshot=None, days='days_exposition', date='first_day_exposition'):
+    """Срок экспозиции в днях: days для снятых объявлений, для censored - дни от публикации до snapshot.
+
+    censored - маска ещё не снятых объявлений (см. align_censored).
+    snapshot - дата выгрузки архива, по умолчанию последняя дата публикации.
+    """
+    dates = df[date]
+    snapshot = dates.max() if snapshot is None else pd.Timestamp(snapshot)
+    exposed = (snapshot - dates).dt.days.to_numpy(dtype='float64', na_value=np.nan)
+    return np.where(align_censored(df, censored), exposed, df[days].to_numpy(dtype='float64', na_value=np.nan))
+
+
+def align_censored(df, censored):
+    """Маска censored по строкам df в виде булева массива.
+
+    Series выравнивается по индексу df, поэтому маску можно взять из
+    исходного архива, даже если df потом отфильтрован или переупорядочен.
+    Массив без индекса считается уже выровненным по позициям строк df.
+    """
+    if isinstance(censored, pd.Series):
+        aligned = censored.reindex(df.index)
+        if aligned.isna().any():
+            raise ValueError(f"censored has no value for {int(aligned.isna().sum())} rows of df")
+        return aligned.to_numpy(dtype=bool)
+    censored = np.asarray(censored, dtype=bool)
+    if len(censored) != len(df):
+        raise ValueError(f"censored has {len(censored)} values for {len(df)} rows of df")
+    return censored
+
+
+def kaplan_meier(durations, sold, segments=None):
+    """Кривые Каплана-Мейера по сегментам: массивы одной длины, segments - целые коды сегментов.
+
+    Возвращает DataFrame со строкой на каждый (сегмент, срок): segment,
+    days, at_risk (ещё не проданы к началу срока), sold, censored и
+    survival - доля непроданных после срока. Строки без срока пропускаются.
+    """
+    durations = np.asarray(durations, dtype='float64')
+    sold = np.asarray(sold, dtype=bool)
+    segments = np.zeros(len(durations), dtype=np.int64) if segments is None else np.asarray(segments)
+    known = ~np.isnan(durations) & (segments >= 0)
+    order = np.lexsort((durations[known], segments[known]))
+    durations = durations[known][order]
+    sold = sold[known][order]
+    segments = segments[known][order]
+    if not len(durations):
+        return pd.DataFrame({'segment': [], 'days': [], 'at_risk': [], 'sold': [], 'censored': [], 'survival': []})
+
+    starts = np.flatnonzero(np.r_[True, (segments[1:] != segments[:-1]) | (durations[1:] != durations[:-1])])
+    counts = np.diff(np.r_[starts, len(durations)])
+    events = np.add.reduceat(sold.astype(np.int64), starts)
+    segment = segments[starts]
+    at_risk = np.searchsorted(segments, segment, side='right') - starts
+    survival = pd.Series(1 - events / at_risk).groupby(segment, sort=False).cumprod().to_numpy()
+    return pd.DataFrame({
+        'segment': segment,
+        'days': durations[starts],
+        'at_risk': at_risk,
+        'sold': events,
+        'censored': counts - events,
+        'survival': survival,
+    })
+
+
+def get_survival_curves(df, censored, by=SEGMENTS, snapshot=None, days='days_exposition',
+                        date='first_day_exposition'):
+    """Кривые Каплана-Мейера по сегментам by; индекс - столбцы by и срок days.
+
+    censored - маска ещё не снятых объявлений (пропусков days_exposition
+    в исходном архиве); Series выравнивается по индексу df.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    censored = align_censored(df, censored)
+    durations = get_durations(df, censored, snapshot, days, date)
+    grouped = df.groupby(by, observed=True, sort=True)
+    curves = kaplan_meier(durations, ~censored, grouped.ngroup().to_numpy())
+    labels = grouped.size().index.take(curves.pop('segment').to_numpy())
+    index = labels.to_frame(index=False).assign(days=curves['days'].to_numpy())
+    return curves.drop(columns='days').set_axis(pd.MultiIndex.from_frame(index))
+
+
+def get_sale_thresholds(curves, fast=0.25, slow=0.75):
+    """Сроки быстрой продажи, медианы и медленной продажи по сегментам кривых.
+
+    fast - срок, к которому продана доля fast объявлений сегмента, median -
+    половина, slow - доля slow. NaN, если из-за непроданных объявлений
+    кривая до этой доли не опускается. Кривые - результат
+    get_survival_curves или kaplan_meier.
+    """
+    if 'segment' in curves.columns:
+        flat, keys = curves, ['segment']
+    else:
+        flat, keys = curves.reset_index(), list(curves.index.names[:-1])
+    grouped = flat.groupby(keys, observed=True, sort=False)
+    thresholds = pd.DataFrame({
+        'listings': grouped['at_risk'].first(),
+        'sold': grouped['sold'].sum(),
+        'censored': grouped['censored'].sum(),
+    })
+    for name, share in [('fast', fast), ('median', 0.5), ('slow', slow)]:
+        reached = flat[flat['survival'] <= 1 - share]
+        # Строки отсортированы по сроку внутри сегмента: первая достигшая строка - искомый срок
+        thresholds[name] = reached.groupby(keys, observed=True, sort=False)['days'].first()
+    return thresholds
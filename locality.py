@@ -0,0 +1,21 @@
+"""Статистика цен по населённым пунктам"""
+
+
+def get_locality_stats(df, quantiles=(), column='square_meter_price', by='locality_name'):
+    """Количество объявлений, медиана и среднее column по населённым пунктам.
+
+    Все населённые пункты считаются за один groupby; quantiles - доли
+    (например, (0.1, 0.9)), для каждой добавляется столбец q10, q90 и т.д.
+    """
+    grouped = df.groupby(by, observed=True)[column]
+    stats = grouped.agg(['count', 'median', 'mean'])
+    if quantiles:
+        levels = grouped.quantile(list(quantiles)).unstack()
+        levels.columns = [f'q{round(level * 100)}' for level in levels.columns]
+        stats = stats.join(levels)
+    return stats
+
+
+def top_localities(stats, n=10, by='count'):
+    """n населённых пунктов с наибольшим значением столбца by"""
+    return stats.nlargest(n, by)
@@ -0,0 +1,113 @@
+"""Единые названия населённых пунктов: таблица канонических названий с кэшем на диске.
+
+Одно место встречается в архиве под разными написаниями: 'посёлок
+янино-1' и 'поселок янино-1', 'городской посёлок янино-1' и 'поселок
+городского типа янино-1'. Каноническое название - без буквы ё, с одним
+написанием типа поселения из синонимов SETTLEMENT_SYNONYMS. Тип
+поселения остаётся в названии: 'деревня щеглово' и 'посёлок щеглово' -
+разные места. Тип снимается только для проверенных псевдонимов из
+LOCALITY_ALIASES (посёлок Мурино и деревня Кудрово стали городами).
+
+Таблица строится по уникальным названиям (категориям), а не по строкам,
+и хранится в CSV: при следующем запуске считаются только названия,
+которых в ней ещё нет. Имя файла содержит хэш правил, поэтому после
+изменения правил таблица строится заново, а не дописывается к старой.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+NAMES_DIR = '.cache'
+# Версия правил: её нужно увеличивать при изменении get_canonical_names
+NAMES_VERSION = 2
+
+# Написания типа поселения (после замены ё) -> каноническое
+SETTLEMENT_SYNONYMS = {
+    'городской поселок': 'поселок городского типа',
+    'поселок при железнодорожной станции': 'поселок станции',
+}
+# Проверенные вручную названия одного места с типом и без него
+LOCALITY_ALIASES = {
+    'поселок мурино': 'мурино',
+    'деревня кудрово': 'кудрово',
+}
+SETTLEMENT_PREFIX = r'^(?:' + '|'.join(SETTLEMENT_SYNONYMS) + r')(?=\s)'
+
+NAMES_DIGEST = hashlib.sha256(
+    json.dumps([NAMES_VERSION, SETTLEMENT_SYNONYMS, LOCALITY_ALIASES], ensure_ascii=False).encode('utf-8')
+).hexdigest()[:16]
+
+
+def names_path(directory=NAMES_DIR):
+    """Файл таблицы названий для текущих правил"""
+    return os.path.join(directory, f'locality_names-{NAMES_DIGEST}.csv')
+
+
+def get_canonical_names(names):
+    """Канонические названия для Index уникальных названий"""
+    names = pd.Index(names, dtype=object)
+    canonical = (
+        names.str.replace('ё', 'е')
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+        .str.replace(SETTLEMENT_PREFIX, lambda match: SETTLEMENT_SYNONYMS[match.group(0)], regex=True)
+    )
+    return pd.Index([LOCALITY_ALIASES.get(name, name) for name in canonical], dtype=object)
+
+
+def get_name_table(names, path=None):
+    """Series название -> каноническое название для names.
+
+    Известные названия берутся из CSV path (по умолчанию names_path()),
+    новые считаются и дописываются в него; файл перезаписывается целиком
+    через временный.
+    """
+    path = names_path() if path is None else path
+    names = pd.Index(names, dtype=object)
+    table = load_name_table(path)
+    missing = names.difference(table.index)
+    if len(missing):
+        table = pd.concat([table, pd.Series(get_canonical_names(missing), index=missing)]).sort_index()
+        save_name_table(table, path)
+    return table.reindex(names)
+
+
+def load_name_table(path):
+    if not os.path.exists(path):
+        return pd.Series([], index=pd.Index([], dtype=object), dtype=object)
+    table = pd.read_csv(path, index_col='name', dtype=str, keep_default_na=False)
+    return table['canonical'].astype(object)
+
+
+def save_name_table(table, path):
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix('.tmp')
+    table.rename_axis('name').rename('canonical').to_csv(partial)
+    os.replace(partial, target)
+
+
+def recode_categories(series, names):
+    """Категориальная series с категориями, переименованными в names.
+
+    names - новые названия в порядке series.cat.categories; совпавшие
+    названия сливаются в одну категорию. Перекодируются только коды,
+    строки датафрейма не сравниваются и не копируются как строки.
+    """
+    categories = pd.Index(pd.unique(np.asarray(names, dtype=object))).sort_values()
+    recode = categories.get_indexer(np.asarray(names, dtype=object))
+    codes = series.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, recode[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=series.index, name=series.name)
+
+
+def canonicalize_locality_name(df, directory=NAMES_DIR):
+    """Замена названий в категориальном locality_name каноническими; таблица хранится в directory"""
+    canonical = get_name_table(df['locality_name'].cat.categories, names_path(directory))
+    df['locality_name'] = recode_categories(df['locality_name'], canonical.to_numpy())
+    return df
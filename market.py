@@ -0,0 +1,151 @@
+"""Индекс рынка: медианная цена квадратного метра по населённым пунктам во времени.
+
+Даты публикации один раз переводятся в номера периодов (месяцев или
+недель). Значения хранятся отсортированными блоками по (населённый
+пункт, период): память - по одному числу на объявление, медиана одного
+периода - середина блока. Медиана окна выбирается без слияния блоков:
+по прореженной выборке из блоков находятся два значения, между которыми
+лежит медиана, searchsorted в каждом блоке даёт отрезок между ними, и
+np.partition работает только по этим отрезкам. Это O(sqrt(n * W))
+значений на запрос при n объявлениях в окне из W блоков вместо O(n).
+
+Новые месяцы добавляются через update: пачка раскладывается по блокам,
+новые периоды добавляются отдельными блоками, а поздние объявления за
+уже известный период сливаются только с блоком этого периода.
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+# Окна до SELECT_MIN значений медиана считает по объединению блоков: на малых окнах так быстрее
+SELECT_MIN = 4096
+
+
+class MarketIndex:
+    """Медианы column по населённым пунктам by для окон из периодов freq ('M' - месяц, 'W' - неделя)"""
+
+    def __init__(self, df=None, freq='M', column='square_meter_price', by='locality_name',
+                 date='first_day_exposition'):
+        self.freq = freq
+        self.column = column
+        self.by = by
+        self.date = date
+        self.first = None
+        self.last = None
+        # населённый пункт -> {номер периода: отсортированные значения}
+        self._blocks = {}
+        if df is not None:
+            self.update(df)
+
+    def update(self, df):
+        """Добавление объявлений df; строки без цены, даты или населённого пункта пропускаются"""
+        values = df[self.column].to_numpy(dtype='float64', na_value=np.nan)
+        dates = df[self.date]
+        known = np.isfinite(values) & dates.notna().to_numpy() & df[self.by].notna().to_numpy()
+        if not known.any():
+            return
+        values = values[known]
+        periods = dates[known].dt.to_period(self.freq).array.asi8
+        self.first = periods.min() if self.first is None else min(self.first, periods.min())
+        self.last = periods.max() if self.last is None else max(self.last, periods.max())
+
+        names = df[self.by].to_numpy()[known]
+        groups = pd.Series(np.arange(len(values))).groupby([names, periods], sort=False).indices
+        for (name, period), positions in groups.items():
+            blocks = self._blocks.setdefault(name, {})
+            new = values[positions]
+            current = blocks.get(period)
+            blocks[period] = np.sort(new if current is None else np.concatenate([current, new]))
+
+    def median(self, locality, start, end=None):
+        """Медиана за периоды от start до end включительно (даты или строки вида '2018-03').
+
+        NaN, если в окне нет объявлений населённого пункта (в том числе
+        если населённого пункта нет в индексе).
+        """
+        end = start if end is None else end
+        first, last = pd.Period(start, self.freq).ordinal, pd.Period(end, self.freq).ordinal
+        return self._window_median(self._blocks.get(locality, {}), first, last)
+
+    def rolling(self, window=1, localities=None):
+        """Медианы по скользящему окну из window последних периодов.
+
+        Строки - все периоды архива, столбцы - населённые пункты
+        (по умолчанию все). window=1 даёт медиану каждого периода, как
+        groupby по населённому пункту и resample по периоду. Для каждого
+        населённого пункта медианы окон выбираются из тех же блоков, что и
+        в median, без слияния блоков; периоды без объявлений в окне - NaN,
+        в том числе для населённых пунктов, которых нет в индексе.
+        """
+        periods = pd.period_range(pd.Period(ordinal=self.first, freq=self.freq),
+                                  pd.Period(ordinal=self.last, freq=self.freq), freq=self.freq)
+        names = list(self._blocks) if localities is None else list(localities)
+        medians = {}
+        for name in names:
+            blocks = self._blocks.get(name, {})
+            medians[name] = [self._window_median(blocks, ordinal - window + 1, ordinal) for ordinal in periods.asi8]
+        return pd.DataFrame(medians, index=periods, dtype='float64')
+
+    @property
+    def nbytes(self):
+        """Размер хранимых значений в байтах"""
+        return sum(block.nbytes for blocks in self._blocks.values() for block in blocks.values())
+
+    def save(self, path):
+        """Сохранение индекса между запусками"""
+        with open(path, 'wb') as target:
+            pickle.dump(self, target)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as source:
+            return pickle.load(source)
+
+    @staticmethod
+    def _window_median(blocks, first, last):
+        window = [blocks[period] for period in range(first, last + 1) if period in blocks]
+        if not window:
+            return np.nan
+        total = sum(len(block) for block in window)
+        middle = total // 2
+        ranks = [middle] if total % 2 else [middle - 1, middle]
+        if len(window) == 1:
+            # Блок уже отсортирован: медиана - его середина
+            values = window[0][ranks]
+        elif total <= SELECT_MIN:
+            values = np.partition(np.concatenate(window), ranks)[ranks]
+        else:
+            values = _select(window, ranks, total)
+        return values.mean()
+
+
+def _select(window, ranks, total):
+    """Значения с номерами ranks (по возрастанию) в объединении отсортированных блоков window без слияния.
+
+    Из каждого блока берётся каждое stride-е значение. Значение выборки с
+    номером t не меньше (t + 1) * stride значений окна и больше не более
+    чем (t + W) * stride из них (W - число блоков), поэтому два значения
+    выборки ограничивают искомые номера снизу и сверху. Затем в каждом
+    блоке searchsorted находит отрезок между границами, и номера
+    выбираются np.partition по значениям этих отрезков.
+    """
+    stride = max(1, int(np.sqrt(total / len(window))))
+    sample = np.concatenate([block[stride - 1::stride] for block in window])
+    low, high = ranks[0] // stride - len(window), ranks[-1] // stride
+    bounds = [position for position in (low, high) if 0 <= position < len(sample)]
+    sample = np.partition(sample, bounds) if bounds else sample
+    lower = sample[low] if low >= 0 else -np.inf
+    upper = sample[high] if high < len(sample) else np.inf
+
+    # Значения блоков конечны: "меньше следующего за upper числа" - то же, что "не больше upper"
+    bounds = np.array([lower, np.nextafter(upper, np.inf)])
+    below = 0
+    between = []
+    for block in window:
+        start, stop = np.searchsorted(block, bounds)
+        between.append(block[start:stop])
+        below += start
+    ranks = [rank - below for rank in ranks]
+    return np.partition(np.concatenate(between), ranks)[ranks]
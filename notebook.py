@@ -0,0 +1,171 @@
+"""Перенос правок project2.py в project2.ipynb с выполнением ноутбука.
+
+Анализ ведётся в project2.ipynb, project2.py - его экспорт (jupyter
+nbconvert --to script): ячейка кода начинается строкой '# In[N]:',
+markdown-ячейки - блоки строк-комментариев между ячейками кода. Правки,
+сделанные прямо в скрипте, переносятся обратно в ноутбук, после чего его
+ячейки выполняются по порядку в общем пространстве имён, как
+jupyter nbconvert --execute, и ноутбук сохраняется с выходами:
+    python notebook.py
+"""
+
+import argparse
+import ast
+import contextlib
+import io
+import json
+import platform
+import re
+
+SCRIPT = 'project2.py'
+NOTEBOOK = 'project2.ipynb'
+CELL_MARKER = re.compile(r'^# In\[(\d*| ?)\]:$')
+METADATA = {
+    'kernelspec': {'display_name': 'Python 3', 'language': 'python', 'name': 'python3'},
+    'language_info': {
+        'codemirror_mode': {'name': 'ipython', 'version': 3},
+        'file_extension': '.py',
+        'mimetype': 'text/x-python',
+        'name': 'python',
+        'nbconvert_exporter': 'python',
+        'pygments_lexer': 'ipython3',
+        'version': platform.python_version(),
+    },
+}
+
+
+def parse_script(text):
+    """Ячейки ноутбука из текста скрипта в формате экспорта Jupyter"""
+    lines = text.splitlines()
+    while lines and (lines[0].startswith('#!') or lines[0].startswith('# coding')):
+        lines.pop(0)
+
+    cells = []
+    position = 0
+    while position < len(lines):
+        line = lines[position]
+        marker = CELL_MARKER.match(line)
+        if marker:
+            position, source = _read_code(lines, position + 1)
+            count = marker.group(1).strip()
+            cells.append(_cell('code', source, int(count) if count else None))
+        elif line.startswith('#'):
+            block = []
+            while position < len(lines) and lines[position].startswith('#') and not CELL_MARKER.match(lines[position]):
+                block.append(re.sub(r'^# ?', '', lines[position]))
+                position += 1
+            cells.append(_cell('markdown', block))
+        else:
+            position += 1
+    return cells
+
+
+def _read_code(lines, position):
+    """Строки ячейки кода до следующей ячейки: после кода экспорт ставит две пустые строки"""
+    source = []
+    while position < len(lines):
+        if CELL_MARKER.match(lines[position]):
+            break
+        if not lines[position].strip():
+            following = position
+            while following < len(lines) and not lines[following].strip():
+                following += 1
+            # Комментарий после двух пустых строк - уже markdown-ячейка, а не код
+            ends_cell = following == len(lines) or (
+                following - position >= 2 and lines[following].startswith('#') and source
+            )
+            if ends_cell:
+                return following, _strip_blank(source)
+            source.extend(lines[position:following])
+            position = following
+            continue
+        source.append(lines[position])
+        position += 1
+    return position, _strip_blank(source)
+
+
+def _strip_blank(source):
+    while source and not source[0].strip():
+        source.pop(0)
+    while source and not source[-1].strip():
+        source.pop()
+    return source
+
+
+def _cell(cell_type, lines, execution_count=None):
+    cell = {
+        'cell_type': cell_type,
+        'metadata': {},
+        'source': [line + '\n' for line in lines[:-1]] + lines[-1:],
+    }
+    if cell_type == 'code':
+        cell['execution_count'] = execution_count
+        cell['outputs'] = []
+    return cell
+
+
+def execute_cells(cells):
+    """Выполнение code-ячеек по порядку, как в свежем ядре: нумерация с 1, выходы в cell['outputs']"""
+    namespace = {'__name__': '__main__'}
+    count = 0
+    for cell in cells:
+        if cell['cell_type'] != 'code':
+            continue
+        count += 1
+        cell['execution_count'] = count
+        cell['outputs'] = _run_cell(''.join(cell['source']), namespace, count)
+    return cells
+
+
+def _run_cell(source, namespace, count):
+    """Выходы ячейки: потоки stdout/stderr и значение последнего выражения, как его показывает Jupyter"""
+    tree = ast.parse(source)
+    last = tree.body.pop() if tree.body and isinstance(tree.body[-1], ast.Expr) else None
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        exec(compile(tree, f'<cell {count}>', 'exec'), namespace)
+        value = None if last is None else eval(compile(ast.Expression(last.value), f'<cell {count}>', 'eval'), namespace)
+
+    outputs = [
+        {'name': name, 'output_type': 'stream', 'text': _lines(stream.getvalue())}
+        for name, stream in (('stdout', stdout), ('stderr', stderr)) if stream.getvalue()
+    ]
+    if value is not None:
+        data = {'text/plain': _lines(repr(value))}
+        html = value._repr_html_() if hasattr(value, '_repr_html_') else None
+        if html is not None:
+            data['text/html'] = _lines(html)
+        outputs.append({'data': data, 'execution_count': count, 'metadata': {}, 'output_type': 'execute_result'})
+    return outputs
+
+
+def _lines(text):
+    """Многострочный текст в формате ipynb: список строк с переводами строк"""
+    return text.splitlines(keepends=True)
+
+
+def build_notebook(script=SCRIPT, notebook=NOTEBOOK, execute=True):
+    """Запись notebook по ячейкам script (с выходами, если execute); возвращает число ячеек"""
+    with open(script, encoding='utf-8') as source:
+        cells = parse_script(source.read())
+    if execute:
+        execute_cells(cells)
+    with open(notebook, 'w', encoding='utf-8') as target:
+        json.dump({'cells': cells, 'metadata': METADATA, 'nbformat': 4, 'nbformat_minor': 2},
+                  target, ensure_ascii=False, indent=1)
+        target.write('\n')
+    return len(cells)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--script', default=SCRIPT)
+    parser.add_argument('--notebook', default=NOTEBOOK)
+    parser.add_argument('--no-execute', dest='execute', action='store_false',
+                        help='записать ячейки без выполнения и выходов')
+    args = parser.parse_args()
+    print(f"{args.notebook}: {build_notebook(args.script, args.notebook, args.execute)} cells")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Компактное представление очищенного датафрейма: меньшие типы и без промежуточных столбцов"""
+
+import numpy as np
+import pandas as pd
+
+# Столбцы, которые остаются от предобработки и расчётов и не нужны анализу:
+# last_pice - целая копия last_price из clean_last_price, quantile_areas и
+# floor_kind_category - служебные столбцы старых версий project2.py
+INTERMEDIATE_COLUMNS = ['last_pice', 'quantile_areas', 'floor_kind_category']
+
+# Денежные столбцы не сжимаются: last_price уже доходит до 763 млн, и в
+# int32 не осталось бы запаса ни для новых выгрузок, ни для арифметики
+MONEY_COLUMNS = ['last_price', 'square_meter_price']
+
+# Доля уникальных значений, ниже которой строки хранятся категорией
+CATEGORY_MAX_SHARE = 0.5
+
+
+def downcast_column(series, rtol=0):
+    """Наименьший тип, в котором значения series не меняются.
+
+    Целые - в наименьший знаковый целый тип. Дробные без пропусков и без
+    дробной части - тоже в целый, остальные - во float32, если значения
+    совпадают с исходными с относительной точностью rtol. По умолчанию
+    rtol=0: во float32 переходят только точно представимые значения, а
+    площади вроде 37.4 остаются float64, чтобы медианы не печатались как
+    37.400001; rtol=1e-6 сжимает и их. Логические без пропусков - в bool,
+    строки с небольшим числом уникальных значений - в категорию.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+        return series
+    if pd.api.types.is_bool_dtype(dtype):
+        return series.astype(bool) if not series.hasnans else series
+    if pd.api.types.is_integer_dtype(dtype):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        if not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+            return pd.to_numeric(series.astype('int64'), downcast='integer')
+        compact = values.astype('float32')
+        if np.allclose(compact, values, rtol=rtol, atol=0, equal_nan=True):
+            return series.astype('float32')
+        return series
+    if pd.api.types.infer_dtype(series, skipna=False) == 'boolean':
+        return series.astype(bool)
+    if series.nunique() < CATEGORY_MAX_SHARE * len(series):
+        return series.astype('category')
+    return series
+
+
+def optimize(df, drop=INTERMEDIATE_COLUMNS, rtol=0, keep=MONEY_COLUMNS):
+    """Удаление промежуточных столбцов drop и приведение остальных, кроме keep, к наименьшим типам"""
+    df = df.drop(columns=[column for column in drop if column in df.columns])
+    for column in df.columns:
+        if column not in keep:
+            df[column] = downcast_column(df[column], rtol)
+    return df
+
+
+def memory_report(before, after):
+    """Память по столбцам до и после в байтах и во сколько раз она уменьшилась.
+
+    before и after - результаты DataFrame.memory_usage(deep=True, index=False);
+    у удалённых столбцов after пустой.
+    """
+    report = pd.DataFrame({'before': before, 'after': after})
+    report.loc['total'] = report.sum()
+    report['ratio'] = report['before'] / report['after']
+    return report
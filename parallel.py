@@ -0,0 +1,74 @@
+"""Параллельный анализ по населённым пунктам на нескольких процессах.
+
+Датафрейм один раз сортируется по населённому пункту и пишется в
+несжатый Feather-файл. Процессы получают только границы своих строк и
+читают их из этого файла через memory map, поэтому данные не копируются
+через pickle в каждый процесс.
+"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from correlation import correlate
+from distance import get_distance_profile
+from locality import get_locality_stats
+
+CORRELATION_FEATURES = ['total_area', 'rooms', 'ceiling_height', 'cityCenters_nearest', 'floor']
+
+
+def analyse_localities(df, workers=4, tasks_per_worker=4, quantiles=(0.1, 0.9), bin_size=1000):
+    """Статистика цен, кривая цены от расстояния и корреляции для каждого населённого пункта.
+
+    df должен содержать производные признаки (square_meter_price). Строки
+    делятся на непрерывные диапазоны из целых населённых пунктов примерно
+    равного размера, по tasks_per_worker диапазонов на процесс.
+
+    Возвращает три таблицы: статистику по населённым пунктам, кривые цены
+    (индекс - населённый пункт и начало интервала) и корреляции цены.
+    """
+    columns = ['locality_name', 'last_price', 'square_meter_price', *CORRELATION_FEATURES]
+    ordered = df[columns].sort_values('locality_name', kind='stable')
+    bounds = _shard_bounds(ordered['locality_name'], workers * tasks_per_worker)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'localities.feather')
+        table = pa.Table.from_pandas(ordered, preserve_index=False)
+        feather.write_feather(table, path, compression='uncompressed')
+        tasks = [(path, start, stop, quantiles, bin_size) for start, stop in bounds]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            shards = list(executor.map(_analyse_shard, tasks))
+
+    stats, profiles, correlations = zip(*shards)
+    return pd.concat(stats), pd.concat(profiles), pd.concat(correlations, ignore_index=True)
+
+
+def _shard_bounds(names, shards):
+    """Границы диапазонов строк: населённый пункт не делится между диапазонами"""
+    starts = np.flatnonzero(np.r_[True, names.to_numpy()[1:] != names.to_numpy()[:-1]])
+    ends = np.r_[starts[1:], len(names)]
+    targets = np.linspace(0, len(names), shards + 1)[1:-1]
+    cuts = np.unique(ends[np.searchsorted(ends, targets)])
+    edges = np.unique(np.r_[0, cuts, len(names)])
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _analyse_shard(task):
+    """Выполняется в процессе: читает свой диапазон строк через memory map"""
+    path, start, stop, quantiles, bin_size = task
+    table = feather.read_table(path, memory_map=True).slice(start, stop - start)
+    shard = table.to_pandas()
+
+    stats = get_locality_stats(shard, quantiles=quantiles)
+    profiles, correlations = [], []
+    for name, locality in shard.groupby('locality_name', observed=True):
+        profile = get_distance_profile(locality, bin_size=bin_size)
+        profiles.append(pd.concat({name: profile}, names=['locality_name']))
+        table = correlate(locality, 'last_price', CORRELATION_FEATURES)
+        correlations.append(table.assign(locality_name=name))
+    return stats, pd.concat(profiles), pd.concat(correlations, ignore_index=True)
@@ -0,0 +1,276 @@
+"""Конвейер анализа объявлений из именованных этапов с хуками профилирования.
+
+Этапы по умолчанию: load (загрузка CSV), impute (предобработка Шага 2),
+derive (производные признаки Шага 3 и сжатие типов), analyse (корреляции,
+статистика по населённым пунктам, кривая цены от расстояния), center
+(центр Санкт-Петербурга против всего города, как в Шаге 4 project2.py) и
+plot (гистограммы в файлы). Этап - функция stage(df, outputs), возвращающая
+датафрейм для следующего этапа; таблицы анализа кладутся в словарь
+outputs.
+
+Хуки получают вызовы before/after вокруг каждого этапа. StageProfiler
+собирает время, процессорное время, пиковую память, строки на входе и
+выходе и оценку числа копий датафрейма, CProfileHook сохраняет профиль
+cProfile каждого этапа, TraceHook пишет trace-event JSON для
+chrome://tracing, Perfetto или speedscope.
+
+Запуск без ноутбука (например, из cron):
+    python pipeline.py --trace trace.json --profile-dir profiles
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import resource
+import time
+import tracemalloc
+
+import pandas as pd
+
+from correlation import correlate
+from distance import get_distance_profile
+from features import add_derived_features
+from histograms import PLOTS_DIR, HistogramCache, render_histograms
+from ingest import DATASET, read_listings
+from locality import get_locality_stats
+from optimize import optimize
+from preprocessing import preprocess
+from segments import CORRELATIONS, MEDIANS, SegmentComparison
+
+# Гистограммы без хвостов из Шага 4 project2.py
+HISTOGRAMS = (
+    ['total_area', 'last_price', 'rooms', 'ceiling_height', 'days_exposition'],
+    [80, 30, 5, 10, 80],
+    [(0, 150), (0, 15000000), (0, 5), (2.25, 3.25), (0, 300)],
+    [(0, 1100), None, None, None, (0, 600)],
+    [
+        'Гистограмма зависимости площади квартиры от количества продаж',
+        'Гистограмма зависимости цены квартиры от количества продаж',
+        'Гистограмма зависимости числа комнат в квартире от количества продаж',
+        'Гистограмма зависимости высоты потолков в квартире от количества продаж',
+        'Гистограмма зависимости срока продажи квартиры от количества продаж',
+    ],
+)
+# Центр Санкт-Петербурга - по излому кривой цены от расстояния в Шаге 4 project2.py
+SPB = 'санкт-петербург'
+CENTER_DISTANCE = 7500
+CENTER_HISTOGRAMS = (
+    ['last_price', 'rooms', 'ceiling_height', 'days_exposition'],
+    [30, 5, 10, 50],
+    [(0, 15000000), (0, 5), (2.25, 3.25), (0, 300)],
+    [None, None, None, (0, 200)],
+    [
+        'Гистограмма зависимости цены квартиры от количества продаж',
+        'Гистограмма зависимости числа комнат в квартире от количества продаж',
+        'Гистограмма зависимости высоты потолков в квартире от количества продаж',
+        'Гистограмма зависимости срока продажи квартиры от количества продаж',
+    ],
+)
+
+
+class Stage:
+    """Именованный этап: func(df, outputs) возвращает датафрейм следующего этапа"""
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+
+
+class PipelineHook:
+    """Интерфейс хука: before и after вызываются вокруг каждого этапа"""
+
+    def before(self, stage, df):
+        pass
+
+    def after(self, stage, df):
+        pass
+
+
+class Pipeline:
+    """Последовательное выполнение этапов с вызовом хуков"""
+
+    def __init__(self, stages, hooks=()):
+        self.stages = list(stages)
+        self.hooks = list(hooks)
+        self.outputs = {}
+
+    def run(self, df=None):
+        self.outputs = {}
+        for stage in self.stages:
+            for hook in self.hooks:
+                hook.before(stage, df)
+            df = stage.func(df, self.outputs)
+            # Хуки вложены, как контекстные менеджеры: первый в списке - внешний
+            for hook in reversed(self.hooks):
+                hook.after(stage, df)
+        return df
+
+
+class StageProfiler(PipelineHook):
+    """Время, память и размеры данных по этапам.
+
+    max_rss_mb - пиковый RSS процесса к концу этапа (ru_maxrss). С
+    trace_memory=True этап выполняется под tracemalloc: allocated_mb -
+    пик выделенной за этап памяти, copies - он же в размерах входного
+    датафрейма, то есть сколько полных копий датафрейма этап держал
+    одновременно. tracemalloc заметно замедляет этапы.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.records = []
+
+    def before(self, stage, df):
+        self._rows_in = 0 if df is None else len(df)
+        self._frame_bytes = None if df is None else frame_bytes(df)
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._traced = tracemalloc.get_traced_memory()[0]
+        self._cpu = time.process_time()
+        self._start = time.perf_counter()
+
+    def after(self, stage, df):
+        record = {
+            'stage': stage.name,
+            'seconds': time.perf_counter() - self._start,
+            'cpu_seconds': time.process_time() - self._cpu,
+            'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'rows_in': self._rows_in,
+            'rows_out': len(df),
+        }
+        if self.trace_memory:
+            allocated = tracemalloc.get_traced_memory()[1] - self._traced
+            record['allocated_mb'] = allocated / 2 ** 20
+            record['copies'] = allocated / (self._frame_bytes or frame_bytes(df))
+        self.records.append(record)
+
+    def to_frame(self):
+        return pd.DataFrame(self.records).set_index('stage')
+
+
+class CProfileHook(PipelineHook):
+    """Профиль cProfile каждого этапа в directory/<этап>.prof (для snakeviz, pstats)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def before(self, stage, df):
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def after(self, stage, df):
+        self._profile.disable()
+        self._profile.dump_stats(os.path.join(self.directory, f'{stage.name}.prof'))
+
+
+class TraceHook(PipelineHook):
+    """События этапов в формате Chrome trace-event (полные события "X", время в мкс)"""
+
+    def __init__(self):
+        self.events = []
+        self._origin = time.perf_counter()
+
+    def before(self, stage, df):
+        self._rows_in = 0 if df is None else len(df)
+        self._start = time.perf_counter()
+
+    def after(self, stage, df):
+        finish = time.perf_counter()
+        self.events.append({
+            'name': stage.name,
+            'cat': 'stage',
+            'ph': 'X',
+            'ts': (self._start - self._origin) * 1e6,
+            'dur': (finish - self._start) * 1e6,
+            'pid': os.getpid(),
+            'tid': 0,
+            'args': {
+                'rows_in': self._rows_in,
+                'rows_out': len(df),
+                'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            },
+        })
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as target:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, target)
+
+
+def frame_bytes(df):
+    """Размер данных датафрейма без обхода строковых объектов"""
+    return max(int(df.memory_usage(index=True, deep=False).sum()), 1)
+
+
+def analyse(df, outputs):
+    """Корреляции цены, статистика по населённым пунктам и кривая цены по Санкт-Петербургу"""
+    outputs['correlations'] = correlate(df, 'last_price', list(CORRELATIONS.values()))
+    outputs['locality_stats'] = get_locality_stats(df, quantiles=(0.1, 0.9))
+    # Строки Санкт-Петербурга выбираются маской внутри профиля, без копии датафрейма
+    outputs['distance_profile'] = get_distance_profile(df, bin_size=500, smooth=3, locality=SPB)
+    return df
+
+
+def get_center_rows(df):
+    """Маски строк Санкт-Петербурга с известным расстоянием до центра и его центра"""
+    spb_rows = (df['locality_name'] == SPB) & df['cityCenters_nearest'].notna()
+    return spb_rows, spb_rows & (df['cityCenters_nearest'] < CENTER_DISTANCE)
+
+
+def get_stages(path=DATASET, plots_dir=PLOTS_DIR):
+    """Этапы project2.py: load, impute, derive, analyse, center, plot"""
+    def center(df, outputs):
+        # Сегменты - маски строк: корреляции, медианы и гистограммы берут из них по столбцу
+        spb_rows, center_rows = get_center_rows(df)
+        outputs['center_correlations'] = correlate(df, 'last_price', rows=center_rows)
+        outputs['center_medians'] = df.loc[center_rows, list(MEDIANS.values())].median()
+        segments = SegmentComparison(df)
+        segments.add('spb_total', spb_rows)
+        segments.add('spb_center', center_rows)
+        outputs['center_comparison'] = segments.compare('spb_total', 'spb_center')
+        outputs['center_plots'] = render_histograms(HistogramCache(df, center_rows), *CENTER_HISTOGRAMS,
+                                                    directory=plots_dir, prefix='spb_center')
+        return df
+
+    def plot(df, outputs):
+        outputs['plots'] = render_histograms(HistogramCache(df), *HISTOGRAMS, directory=plots_dir)
+        return df
+
+    return [
+        Stage('load', lambda df, outputs: read_listings(path)),
+        Stage('impute', lambda df, outputs: preprocess(df)),
+        Stage('derive', lambda df, outputs: optimize(add_derived_features(df))),
+        Stage('analyse', analyse),
+        Stage('center', center),
+        Stage('plot', plot),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dataset', default=DATASET)
+    parser.add_argument('--plots-dir', default=PLOTS_DIR)
+    parser.add_argument('--trace', help='файл trace-event JSON')
+    parser.add_argument('--profile-dir', help='каталог для профилей cProfile по этапам')
+    parser.add_argument('--trace-memory', action='store_true', help='пик памяти и копии через tracemalloc')
+    args = parser.parse_args()
+
+    hooks = []
+    if args.profile_dir:
+        hooks.append(CProfileHook(args.profile_dir))
+    trace = TraceHook()
+    profiler = StageProfiler(trace_memory=args.trace_memory)
+    # Профилировщик - самый внутренний хук и не замеряет работу остальных
+    hooks += [trace, profiler]
+
+    Pipeline(get_stages(args.dataset, args.plots_dir), hooks).run()
+    print(profiler.to_frame().to_string(float_format='{:.3f}'.format))
+    if args.trace:
+        trace.save(args.trace)
+
+
+if __name__ == '__main__':
+    main()
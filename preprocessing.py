@@ -0,0 +1,136 @@
+"""Предобработка архива объявлений: заполнение пропусков и приведение типов (Шаг 2)"""
+
+import functools
+import hashlib
+import inspect
+import json
+import sys
+
+import pandas as pd
+
+import imputers
+from imputers import fill_cascade_median, fill_hierarchical_median, fill_quantile_bucket_median
+from ingest import SCHEMA
+from locality_names import NAMES_DIGEST, NAMES_DIR, canonicalize_locality_name, recode_categories
+
+# Версия входит в ключ кэша очищенного датафрейма. Это хэш всего, от чего
+# зависит результат: исходного кода этого модуля и imputers.py, типов
+# столбцов при чтении (ingest.SCHEMA) и правил названий населённых пунктов
+# (NAMES_DIGEST), поэтому любая их правка сама даёт новый ключ кэша
+PREPROCESSING_VERSION = hashlib.sha256(json.dumps([
+    inspect.getsource(sys.modules[__name__]),
+    inspect.getsource(imputers),
+    SCHEMA,
+    NAMES_DIGEST,
+], ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+# Картографические данные, которые неоткуда восстановить. Пропуски в них
+# остаются NaN во float32 (см. ingest.SCHEMA): агрегации pandas и numpy
+# с nan-функциями пропускают их сами, и фильтровать заглушки не нужно
+GEO_COLUMNS = [
+    'airports_nearest',
+    'cityCenters_nearest',
+    'parks_around3000',
+    'parks_nearest',
+    'ponds_around3000',
+    'ponds_nearest',
+]
+
+
+def fill_is_apartment(df):
+    """Пропуски в is_apartment - не апартаменты"""
+    df['is_apartment'] = df['is_apartment'].fillna(False)
+    return df
+
+
+def fill_balcony(df):
+    """Пропуски в balcony - балконов нет"""
+    df['balcony'] = df['balcony'].fillna(0.0)
+    return df
+
+
+def get_median_days_exposition(df):
+    """Функция заполнения количества дней размещения медианным значением:
+    медиана по году и месяцу публикации, а если её нет - медиана по году"""
+    dates = df['first_day_exposition'].dt
+    year, month = dates.year, dates.month
+    return fill_hierarchical_median(df, 'days_exposition', [[year, month], [year]])
+
+
+def get_median_living_area(df):
+    """Функция заполнения пропусков в жилой площади медианным значением:
+    сначала по общей площади, затем по количеству комнат.
+
+    Статистика каскада сохраняется в df.attrs (см. get_fill_stats) и
+    вместе с датафреймом попадает в кэш.
+    """
+    df, stats = fill_cascade_median(df, 'living_area', [['total_area'], ['rooms']])
+    df.attrs.setdefault('fill_stats', {})['living_area'] = stats.reset_index().to_dict('records')
+    return df
+
+
+def get_fill_stats(df, column='living_area'):
+    """Статистика каскадного заполнения column по уровням: число групп, заполнено и осталось пропусков"""
+    return pd.DataFrame(df.attrs['fill_stats'][column]).set_index('level')
+
+
+def get_median_kitchen_area(df):
+    """Функция заполнения пропусков в площади кухни медианой по децилям жилой площади"""
+    return fill_quantile_bucket_median(df, 'kitchen_area', by='living_area', q=10)
+
+
+def fill_floors_total(df):
+    """Пропуски в этажности дома - среднее по выборке, приведённое к целому"""
+    floors_total_mean = df['floors_total'].mean()
+    df['floors_total'] = df['floors_total'].fillna(floors_total_mean).astype(int)
+    return df
+
+
+def fill_ceiling_height(df):
+    """Пропуски в высоте потолков - медианная высота"""
+    df['ceiling_height'] = df['ceiling_height'].fillna(df['ceiling_height'].median())
+    return df
+
+
+def fill_locality_name(df):
+    """Пропуски в названии населённого пункта - 'undefined'"""
+    df['locality_name'] = df['locality_name'].cat.add_categories('undefined').fillna('undefined')
+    return df
+
+
+def clean_last_price(df):
+    """Цена в целом типе, неположительные цены заменяются медианой"""
+    df['last_pice'] = df['last_price'].astype(int)
+    df.loc[df['last_pice'] <= 0, 'last_pice'] = df['last_price'].median().astype(int)
+    return df
+
+
+def clean_locality_name(df):
+    """Единое написание названий населённых пунктов; правятся категории, а не строки"""
+    names = df['locality_name'].cat.categories
+    df['locality_name'] = recode_categories(df['locality_name'], names.str.strip().str.lower())
+    return df
+
+
+def get_preprocessing_steps(names_dir=NAMES_DIR):
+    """Шаги предобработки по порядку; таблица названий населённых пунктов хранится в names_dir"""
+    return [
+        fill_is_apartment,
+        fill_balcony,
+        get_median_days_exposition,
+        get_median_living_area,
+        get_median_kitchen_area,
+        fill_floors_total,
+        fill_ceiling_height,
+        fill_locality_name,
+        clean_last_price,
+        clean_locality_name,
+        functools.partial(canonicalize_locality_name, directory=names_dir),
+    ]
+
+
+def preprocess(df, names_dir=NAMES_DIR):
+    """Все шаги предобработки по порядку; таблица названий населённых пунктов хранится в names_dir"""
+    for step in get_preprocessing_steps(names_dir):
+        df = step(df)
+    return df
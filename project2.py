@@ -14,11 +14,26 @@
 # In[38]:
 
 
-import matplotlib.pyplot as plt
-import pandas as pd
-import math
-
-df = pd.read_csv('datasets/real_estate_data.csv', delimiter='\t')
+import time
+
+import numpy as np
+
+from anomalies import IQR_COLUMNS, score_anomalies
+from cache import load_clean_listings
+from correlation import correlate
+from distance import get_distance_profile, render_distance_profile
+from features import add_area_ratios, add_exposition_dates, add_floor_kind, add_square_meter_price
+from histograms import HistogramCache, render_histograms
+from ingest import read_listings
+from liquidity import get_durations, get_sale_thresholds, get_survival_curves, kaplan_meier
+from locality import get_locality_stats, top_localities
+from market import MarketIndex
+from optimize import memory_report, optimize
+from segments import CORRELATIONS, SegmentComparison
+from valuation import ValuationModel
+from preprocessing import GEO_COLUMNS, get_fill_stats
+
+df = read_listings()
 
 print (df.info())
 print (df.head(1))
@@ -31,6 +46,8 @@ print (df.head(1))
 # Всего в таблице 23699 строк и 22 столбца. Из всех строк нет пропусков только у 8-ти столбцов. Для всех остальных колонок данные нужно восстанавливать.
 # 
 # Не все типы данных определились автоматически. Например, столбец "first_day_exposition" должен иметь тип datetime, а "is_apartment" - bool. Тоже нужно исправлять.
+# 
+# Поэтому типы всех столбцов задаются явной схемой при чтении (ingest.SCHEMA): даты разбираются сразу, "locality_name" - категория, счётчики - узкие числовые типы.
 
 # ### Шаг 2. Предобработка данных
 
@@ -50,13 +67,14 @@ print (df.head(1))
 #     - [x] ponds_nearest
 #     - [x] days_exposition
 # 
+# Здесь мы только изучаем пропуски и выбираем способ заполнения. Сами заполнения собраны в preprocessing.py и выполняются один раз при загрузке очищенной таблицы в конце шага; там же проверяем, что пропуски заполнились.
+# 
 # Сначала обрабатываем те значения, которые легче логически заполнить
 # 
 # is_apartment:
 # - Смотрим данные
 # - Смотрим количество пропущенных значений
-# - Заполняем пропуски значением "False" - оно самое логичное
-# - Проверяем, что пропуски заполнились
+# - Пропуски заполняем значением "False" - оно самое логичное
 # 
 # 
 
@@ -65,58 +83,33 @@ print (df.head(1))
 
 print (f"value_counts: \n{df['is_apartment'].value_counts()}")
 print (f"\nisna count: \n{df['is_apartment'].isna().count()}")
-df['is_apartment'] = df['is_apartment'].fillna(False)
-print (f"\nvalue_counts: \n{df['is_apartment'].value_counts()}")
 
 
 # balcony:
 # - Смотрим данные
-# - Заполняем пропуски значением "0.0" - оно самое логичное
-# - Проверяем, что пропуски заполнились
+# - Пропуски заполняем значением "0.0" - оно самое логичное
 
 # In[40]:
 
 
 print (f"value_counts: \n{df['balcony'].value_counts()}")
 print (f"\nisna count: \n{df['balcony'].isna().sum()}")
-df['balcony'] = df['balcony'].fillna(0.0)
-print (f"\nvalue_counts: \n{df['balcony'].value_counts()}")
-print (f"\nisna count: \n{df['balcony'].isna().sum()}")
 
 
 # days_exposition:
 # 
-# У некоторых квартир не заполен столбец "days_exposition" (сколько дней было размещено объявление), однако, у всех заполнен "last_price" - значит, 
-# все квартиры были сняты с публикации, и пропуски в столбце "days_exposition" можно заполнить. Заполнение будет происходить в зависимости от даты публикации. 
-# Для каждого пропуска каждой даты будем высчитывать медианное значение заполненных дат.
+# У некоторых квартир не заполен столбец "days_exposition" (сколько дней было размещено объявление). Пропуск значит, что на момент выгрузки объявление ещё не снято: квартира не продалась за время от публикации до выгрузки. 
+# Для таблицы без пропусков заполним их в зависимости от даты публикации: для каждого пропуска каждой даты будем высчитывать медианное значение заполненных дат. Для сроков продажи в Шаге 4 такие объявления учитываются отдельно, как ещё не проданные.
 # 
-# Перед заполнением пропусков в столбце "days_exposition" нужно перевести столбец "first_day_exposition" в дату, т.к. первый зависит от второго.
+# Столбец "first_day_exposition" уже прочитан как дата, поэтому от него можно сразу считать медианы.
 
 # In[41]:
 
 
-df['first_day_exposition'] = pd.to_datetime(df['first_day_exposition'], format='%Y-%m-%dT%H:%M:%S')
-
-def get_median_days_exposition(df):
-    """Функция заполнения количества дней размещения медианным значением"""
-    years = pd.DatetimeIndex(df['first_day_exposition']).year.value_counts().index
-    monthes = pd.DatetimeIndex(df['first_day_exposition']).month.value_counts().index
-
-    for year in years:
-        for month in monthes:
-            median = df[(df['days_exposition'].notna()) & (pd.DatetimeIndex(df['first_day_exposition']).year == year) & (pd.DatetimeIndex(df['first_day_exposition']).month == month)]['days_exposition'].median()
-            if math.isnan(median):
-                median = df[(df['days_exposition'].notna()) & (pd.DatetimeIndex(df['first_day_exposition']).year == year)]['days_exposition'].median()
-            df.loc[((df['days_exposition'].isna()) & (pd.DatetimeIndex(df['first_day_exposition']).year == year) & (pd.DatetimeIndex(df['first_day_exposition']).month == month)), 'days_exposition'] = median
-            
-    return df
-
-print ("Заполняем пропуски в столбце \"days_exposition\"\nВсего пропусков: ")
-print (df['days_exposition'].isna().sum())
-df = get_median_days_exposition(df)
-
-print ("\nПроверяем, что пропуски заполнились: ")
+print ("Пропуски в столбце \"days_exposition\"\nВсего пропусков: ")
 print (df['days_exposition'].isna().sum())
+# Пропуск - объявление ещё не снято; маска нужна для анализа сроков продажи в Шаге 4
+unsold = df['days_exposition'].isna()
 
 
 # <div style="border:solid green 4px; padding: 20px">Хорошо.</div>
@@ -124,8 +117,7 @@ print (df['days_exposition'].isna().sum())
 # living_area:
 # - Проверяем количество пропусков
 # - Ищем зависимости между общей площадью и жилой
-# - Заполняем пропуски
-# - Проверяем, что пропуски заполнились
+# - Выбираем, по чему заполнять пропуски
 
 # In[42]:
 
@@ -135,7 +127,7 @@ print ("\nИщем зависимости между общей площадью
 #print (df[df['living_area'].notna()]['living_area'].corr(df[df['total_area'].notna()]['total_area']))
 #print (df[df['living_area'].notna()]['living_area'].corr(df[df['rooms'].notna()]['rooms']))
        
-print (df.corr()['living_area'].reset_index(name='correlation'))
+print (correlate(df, 'living_area'))
 
 
 # <div style="border:solid #ebd731; 4px; padding: 20px">Корреляции удобно смотреть вкупе, изобразив матрицу корреляций.
@@ -149,75 +141,31 @@ print (df.corr()['living_area'].reset_index(name='correlation'))
 # Обнаружена прямая зависимость между жилой площадью и ценой квартиры: коэффициент корреляции 0.56
 # 
 # Первые два параметра достаточно сильные, пропуски можно заполнить, опираясь только на них.<br>
-# Заполним пропуски: сначала по общей площади, после по жилой:
-
-# In[43]:
-
-
-def get_median_living_area(df):
-    """Функция заполнения пропусков в жилой площади медианным значением"""
-    areas = df['total_area'].value_counts().index
-    for area in areas:
-        median = df[((df['living_area'].notna()) & (df['total_area'] == area))]['living_area'].median()
-        df.loc[((df['living_area'].isna()) & (df['total_area'] == area)), 'living_area'] = median
-    
-    rooms = df['rooms'].value_counts().index
-    for room in rooms:
-        median = df[((df['living_area'].notna()) & (df['rooms'] == room))]['living_area'].median()
-        df.loc[((df['living_area'].isna()) & (df['rooms'] == room)), 'living_area'] = median
-    
-    return df
-
-df = get_median_living_area(df)
-print ("\nПроверяем, что пропуски заполнились ")
-print (f"isna sum: {df['living_area'].isna().sum()}")
-
+# Пропуски заполним медианами: сначала по общей площади, после по количеству комнат (по уже заполненному столбцу).
 
 # Теперь на основе жилой площади можно заполнить площадь кухни. 
-# Делим всю жилую площадь на 10 квантилей, ищем медианное значение и заполняем пропуски
+# Делим всю жилую площадь на 10 квантилей, пропуски заполним медианой своего квантиля
 # 
 # kitchen_area:
 # - Проверяем количество пропусков
-# - Заполняем пропуски
-# - Проверяем, что пропуски заполнились
 
 # In[44]:
 
 
 print (f"isna sum: {df['kitchen_area'].isna().sum()}")
 
-def get_median_kitchen_area(df):
-    df.sort_values(by='living_area', inplace=True)
-    df['quantile_areas'] = pd.qcut(df['living_area'], 10, labels=False)
-    areas = df['quantile_areas'].value_counts().index
-    for area in areas:
-        median = df[(df['kitchen_area'].notna()) & (df['quantile_areas'] == area)]['kitchen_area'].median()
-        df.loc[(df['kitchen_area'].isna()) & (df['quantile_areas'] == area), 'kitchen_area'] = median
-    
-    return df
-
-df = get_median_kitchen_area(df)
-print ("\nПроверяем, что пропуски заполнились: ")
-print (f"isna sum: {df['kitchen_area'].isna().sum()}")
-
 
 # Смотрим, сколько всего этажей в домах. На первый взгляд этажей много, как проследить зависимость от других параметров - хз. Обычно, количество этажей дома не зависит от чего-либо. В одном доме могут быть разные квартиры - однушки, трешки, разной площади и с разными балконами. К сожалению, в представленной выборке нет связей квартиры с домом - иначе, можно было бы легко заполнить пропуски. Чтобы не было пропусков, заполним их средней температурой по больнице и приведем к целому типу.
 # 
 # floors_total:
 # - Смотрим, сколько всего этажей в домах
-# - Заполняем пропуски средней температурой по больнице
-# - Проверяем, что пропуски заполнились
+# - Пропуски заполним средней температурой по больнице
 
 # In[45]:
 
 
 print (f"isna sum: {df['floors_total'].isna().sum()}")
 print (df[df['floors_total'].notna()]['floors_total'].value_counts())
-floors_total_mean = df[df['floors_total'].notna()]['floors_total'].mean()
-df['floors_total'] = df.fillna(floors_total_mean)
-df['floors_total'] = df['floors_total'].astype(int)
-print ("\nПроверяем, что пропуски заполнились: ")
-print (f"isna sum: {df['floors_total'].isna().sum()}")
 
 
 # Высота потолков не зависит от этажности дома или от площади. Она напрямую зависит от класса. Если дом высокого класса и комфорта, то потолки будут высокие. Если же стандартный класс - то потолки будут стандартно 2.67 - 2.72. Попробуем привязаться к цене дома. Посмотрим, насколько потолок зависит от цены:
@@ -240,36 +188,41 @@ print (f"Средняя: {df[df['ceiling_height'].notna()]['ceiling_height'].mea
 print (f"Медианная: {df[df['ceiling_height'].notna()]['ceiling_height'].median()}")
 
 
-# Средний показатель что-то слишком высокий. Запоним пропуски медианным:
+# Средний показатель что-то слишком высокий. Пропуски заполним медианным, а пока смотрим их число:
 
 # In[48]:
 
 
-print (f"isna sum: {df['ceiling_height'].isna().sum()}")
-df['ceiling_height'] = df['ceiling_height'].fillna(df['ceiling_height'].median())
-print ("\nПроверяем, что пропуски заполнились: ")
 print (f"isna sum: {df['ceiling_height'].isna().sum()}")
 
 
-# Оставшиеся пропуски - данные о местоположении, парках и водоемах поблизости. Эти значения не зависят от других величин. Добавим информацию о том, что для них значение не опредлено.
+# Оставшиеся пропуски - данные о местоположении, парках и водоемах поблизости. Эти значения не зависят от других величин. Для названия населённого пункта добавим значение 'undefined', а картографические данные оставим пропусками (NaN): агрегации pandas пропускают их сами, а заглушку вроде -999.99 пришлось бы отфильтровывать (и копировать таблицу) перед каждым расчётом.
 
 # In[49]:
 
 
-df['locality_name'] = df['locality_name'].fillna('undefined')
-df['airports_nearest'] = df['airports_nearest'].fillna(-999.99)
-df['cityCenters_nearest'] = df['cityCenters_nearest'].fillna(-999.99)
-df['parks_around3000'] = df['parks_around3000'].fillna(-999.99)
-df['parks_nearest'] = df['parks_nearest'].fillna(-999.99)
-df['ponds_nearest'] = df['ponds_nearest'].fillna(-999.99)
+print (f"isna sum: \n{df[['locality_name', *GEO_COLUMNS]].isna().sum()}")
 
-print ("\nЗаменяем поле last_price на тип int")
-df['last_pice'] = df['last_price'].astype(int)
-df.loc[df['last_pice'] <= 0, 'last_pice'] = df['last_price'].median().astype(int)
 
-print ("\nЗаодно почистим значения в единственном строковом столбце")       
-df['locality_name'] = df['locality_name'].str.strip().str.lower()
+# Все описанные выше шаги собраны в preprocessing.py. Очищенная таблица кэшируется на диске (cache.py): повторный запуск на тех же данных и с той же версией предобработки не пересчитывает медианы, а читает готовую таблицу.
+# 
+# Загружаем очищенную таблицу и проверяем каждое заполнение: сколько пропусков было и сколько осталось, а для жилой площади - сколько пропусков закрыл каждый уровень каскада.
+
+# In[ ]:
+
+
+# Маски пропусков исходного архива: заполненные медианы не должны участвовать в поиске выбросов (Шаг 4)
+imputed = df[IQR_COLUMNS].isna()
+filled_columns = ['is_apartment', 'balcony', 'days_exposition', 'living_area', 'kitchen_area',
+                  'floors_total', 'ceiling_height', 'locality_name']
+missing = df[filled_columns].isna().sum().to_frame('before')
+df = load_clean_listings()
+missing['after'] = df[filled_columns].isna().sum()
 
+print ("Проверяем, что пропуски заполнились:")
+print (missing)
+print ("\nЗаполнение жилой площади по уровням:")
+print (get_fill_stats(df, 'living_area'))
 print ("\nПроверяем, что все данные заполнились:")
 print (df.info())
        
@@ -281,29 +234,25 @@ print (df.info())
 
 
 print ("\nРассчитываем цену квадратного метра: last_price / total_area")
-df['square_meter_price'] = df['last_price'] / df['total_area']
+df = add_square_meter_price(df)
 print ("\nРассчитываем день недели, месяц и год публикации объявления")
-df['day_exposition'] = pd.DatetimeIndex(df['first_day_exposition']).weekday
-df['month_exposition'] = pd.DatetimeIndex(df['first_day_exposition']).month
-df['year_exposition'] = pd.DatetimeIndex(df['first_day_exposition']).year
+df = add_exposition_dates(df)
 print ("\nРассчитываем этаж квартиры: Первый, последний, другой")
-
-def get_flat_floor (rows):
-    floor = rows[0]
-    floors_total = rows[1]
-    if floor == 1:
-        return 'первый'
-    elif floor == floors_total:
-        return 'последний'
-    return 'другой'
-
-df['floor_kind'] = df[['floor', 'floors_total']].apply(get_flat_floor, axis=1)
+df = add_floor_kind(df)
 print ("\nПроверяем, что данные заполнились: ")
 print (df['floor_kind'].value_counts())
-print ("\nРасчитываем соотношение жилой площади к общей.")
-df['living_to_total_area'] = df['living_area'] / df['total_area']
-print ("\nРасчитываем соотношение площади кухни к общей площади.")
-df['living_to_total_area'] = df['kitchen_area'] / df['total_area']
+print ("\nРасчитываем соотношение жилой площади и площади кухни к общей.")
+df = add_area_ratios(df)
+
+
+# Все признаки посчитаны: убираем промежуточные столбцы и сжимаем типы, чтобы архивы по большим регионам помещались в память. Денежные столбцы (last_price, square_meter_price) не сжимаем, чтобы не упереться в переполнение int32.
+
+# In[ ]:
+
+
+memory_before = df.memory_usage(deep=True, index=False)
+df = optimize(df)
+print (memory_report(memory_before, df.memory_usage(deep=True, index=False)))
 
 
 # ### Шаг 4. Проведите исследовательский анализ данных и выполните инструкции:
@@ -316,21 +265,19 @@ df['living_to_total_area'] = df['kitchen_area'] / df['total_area']
 
 """Строим гистограммы и удивляемся значениям"""
 
-def print_hist_plots(df, columns, bins, ranges, ylims, titles):
-    """Печать гистограмм с заданными параметрами"""
-    for i in range(0, len(columns)):
-        print (df[columns[i]].plot(
-            kind='hist', 
-            bins=bins[i], 
-            range=ranges[i],
-            ylim=ylims[i],
-            title=titles[i]
-        ))
-        plt.show()
+def print_hist_plots(histograms, columns, bins, ranges, ylims, titles, prefix='df'):
+    """Печать гистограмм с заданными параметрами: частоты из кэша, картинки в файлы PLOTS_DIR"""
+    start = time.perf_counter()
+    paths = render_histograms(histograms, columns, bins, ranges, ylims, titles, prefix=prefix)
+    print (f"Гистограммы сохранены за {time.perf_counter() - start:.2f} с:")
+    for path in paths:
+        print (path)
     return
 
+df_histograms = HistogramCache(df)
+
 print_hist_plots(
-    df, 
+    df_histograms, 
     ['total_area', 'last_price', 'rooms', 'ceiling_height'],
     [100, 100, 10, 20],
     [(0, 400), (0, 40000000), (0, 9), (2.25, 4)],
@@ -353,7 +300,7 @@ print (f"\nСреднее время продажи квартиры: {df['days_
 print (f"\nМедианное время продажи квартиры: {df['days_exposition'].median()}\n")
        
 print_hist_plots(
-    df, 
+    df_histograms, 
     ['days_exposition'],
     [100],
     [(0, 600)],
@@ -366,13 +313,24 @@ print_hist_plots(
 
 # Обычно квартира либо продается сразу, либо в течении 3-х месяцев (90 дней). На гистограмме видно, что после 90-100 дней идет спад количества проданных квартир. "Хвост" тянется очень далеко, примерно на 600 днях его можно обрубить - дальше нет смысла рассматривать значения.
 
+# Но среднее и медиана выше посчитаны по заполненному столбцу: ещё не снятые объявления (пропуски в исходных данных) выданы за продажи со средним сроком. Честнее считать их цензурированными: известно только, что квартира не продалась до выгрузки архива. Кривые доли непроданных квартир (Каплан-Мейер, liquidity.py) по населённому пункту, числу комнат и этажу и сроки, к которым продана четверть (быстрая продажа), половина и три четверти (медленная продажа) квартир:
+
+# In[ ]:
+
+
+sale_curves = get_survival_curves(df, unsold)
+sale_thresholds = get_sale_thresholds(sale_curves)
+print (get_sale_thresholds(kaplan_meier(get_durations(df, unsold), ~unsold)))
+print (sale_thresholds[sale_thresholds['listings'] >= 300].sort_values('median'))
+
+
 # Убираем хвосты и выбивающиеся значения у диаграмм выше:
 
 # In[53]:
 
 
 print_hist_plots(
-    df, 
+    df_histograms, 
     ['total_area', 'last_price', 'rooms', 'ceiling_height', 'days_exposition'],
     [80, 30, 5, 10, 80],
     [(0, 150), (0, 15000000), (0, 5), (2.25, 3.25), (0, 300)],
@@ -394,26 +352,23 @@ print_hist_plots(
 # 4. Самая популярная высота потолков 2.5 - 2.8. Наши предположения подтвердились.
 # 5. Большинство квартир продается довольно быстро. от 0 до 100-150 дней.
 
+# Хвосты гистограмм - кандидаты в аномалии. Отметим их по правилам, а не на глаз: цена квадратного метра далеко от медианы своей группы (населённый пункт, число комнат, этаж) и далёкие выбросы по IQR для высоты потолков, площади и срока продажи. Квартили и выбросы считаются только по заполненным пользователями значениям: медианы, которыми заполнены пропуски, сжали бы межквартильный размах. Доля отмеченных объявлений:
+
+# In[ ]:
+
+
+anomalies = score_anomalies(df, imputed=imputed)
+print (anomalies.drop(columns='square_meter_price_zscore').mean())
+
+
 # Изучаем, какие факторы влияют на стоимость квартиры:
 
 # In[54]:
 
 
-print ("Зависимость цены от квадратного метра: ")
-print (df['last_price'].corr(df['square_meter_price']))
-print ("Зависимость цены от этажа: ")
-df['floor_kind_category'] = df['floor_kind'].astype('category').cat.codes
-print (df['last_price'].corr(df['floor_kind_category']))
-print ("Зависимость цены от количества комнат: ")
-print (df['last_price'].corr(df['rooms']))
-print ("Зависимость цены от удаленности от цента: ")
-print (df['last_price'].corr(df[df['cityCenters_nearest'] != -999.99]['cityCenters_nearest']))
-print ("Зависимость цены от дня публикации: ")
-print (df['last_price'].corr(df['day_exposition']))
-print ("Зависимость цены от месяца публикации: ")
-print (df['last_price'].corr(df['month_exposition']))
-print ("Зависимость цены от года публикации: ")
-print (df['last_price'].corr(df['year_exposition']))
+price_correlations = correlate(df, 'last_price', list(CORRELATIONS.values()))
+price_correlations.index = list(CORRELATIONS)
+print (price_correlations['correlation'])
 
 
 # Цена квартиры напрямую зависит от цены квадратного метра.
@@ -421,13 +376,25 @@ print (df['last_price'].corr(df['year_exposition']))
 # 
 # От остальных вышерпдеставленных параметров цена не зависит - коэффициент корреляции меньше 0.1 и стремится к нулю.
 
+# Дни недели, месяцы и годы публикации по отдельности мало что говорят. Посмотрим динамику: медиана цены квадратного метра по месяцам, окном в 3 месяца, для населённых пунктов с наибольшим числом объявлений (market.py).
+
+# In[ ]:
+
+
+market = MarketIndex(df)
+market_localities = df['locality_name'].value_counts().index[:5]
+print (market.rolling(window=3, localities=market_localities).tail(12).round())
+print (f"\nМедиана по Санкт-Петербургу за 2018 год: {market.median('санкт-петербург', '2018-01', '2018-12'):.0f}")
+
+
 # 10 населенных пунктов с наибольшим числом объявлений:
 
 # In[55]:
 
 
-top_ads = df.groupby('locality_name')['last_price'].count().reset_index(name='count').sort_values(['count'], ascending=False).head(10)
-top_ads
+locality_stats = get_locality_stats(df)
+top_ads = top_localities(locality_stats, 10).reset_index()
+top_ads[['locality_name', 'count']]
 
 
 # Средняя цена за метр в этих районах:
@@ -435,11 +402,8 @@ top_ads
 # In[56]:
 
 
-def get_mean_square_price(row):
-    return df[df['locality_name'] == row]['square_meter_price'].median().astype(int)
-
-top_ads['mean_square_price'] = top_ads['locality_name'].apply(get_mean_square_price)
-top_ads
+top_ads['mean_square_price'] = top_ads['median'].astype(int)
+top_ads[['locality_name', 'count', 'mean_square_price']]
 
 
 # Хорошо, что не стали заполнять пропущенные значения в "locality_name" по стоимости жилья. Пушкин недалеко ушел от Питера по цене.
@@ -449,42 +413,30 @@ top_ads
 # In[57]:
 
 
-print (f"Самая высокая стоимость жилья в населенном пункте \"{top_ads.sort_values(by='mean_square_price', ascending=False).head(1)['locality_name'].to_string(index=False)}\"")
-print (f"Самая низкая стоимость жилья в населенном пункте \"{top_ads.sort_values(by='mean_square_price').head(1)['locality_name'].to_string(index=False)}\"")
+print (f"Самая высокая стоимость жилья в населенном пункте \"{top_ads.sort_values(by='mean_square_price', ascending=False)['locality_name'].iloc[0]}\"")
+print (f"Самая низкая стоимость жилья в населенном пункте \"{top_ads.sort_values(by='mean_square_price')['locality_name'].iloc[0]}\"")
        
 
 
 # ### Ищем центр Санкт-Петербурга
 # 
-# Отфильтруем данные по местоположению "Санкт-Петербург":
+# Отфильтруем данные по местоположению "Санкт-Петербург" - маской строк, без копии датафрейма:
 
 # In[58]:
 
 
-spb_data = df[(df['locality_name'] == 'санкт-петербург') & (df['cityCenters_nearest'] != -999.99)]
-spb_data.reset_index(drop=True, inplace=True)
+spb_rows = (df['locality_name'] == 'санкт-петербург') & df['cityCenters_nearest'].notna()
 
 
-# Округляем расстояние до центра:
+# Расстояние до центра не округляем и не перезаписываем: это лишняя копия столбца, а get_distance_profile сам выбирает строки Санкт-Петербурга и раскладывает метры по интервалам.
 
-# In[59]:
-
-
-spb_data['cityCenters_nearest'] = spb_data['cityCenters_nearest'].astype(int)
-
-
-# Считаем среднюю цену для каждого километра:
+# Считаем медианную цену для каждых 500 метров: в точном значении метров обычно одно объявление, и кривая получается шумной. Дополнительно сглаживаем медианы скользящей медианой по трём соседним интервалам (столбец smoothed) и строим график по ней.
 
 # In[60]:
 
 
-def get_mean_per_m(row):
-    return spb_data[spb_data['cityCenters_nearest'] == row]['last_price'].median().astype(int)
-
-meters = spb_data['cityCenters_nearest'].value_counts().index
-df_meters = pd.DataFrame({'meters': meters})
-df_meters['city_price_mean'] = df_meters['meters'].apply(get_mean_per_m)
-df_meters['city_price_mean'].head()
+df_meters = get_distance_profile(df, bin_size=500, smooth=3, locality='санкт-петербург')
+df_meters.head()
 
 
 # Построим график, чтобы понять где сильно мемняется цена - ищем центр с города с мажорскими ценами
@@ -495,12 +447,12 @@ df_meters['city_price_mean'].head()
 # In[62]:
 
 
-df_meters.plot(
-    kind='scatter',
-    x='meters',
-    y='city_price_mean',
-    title='Зависимость стоимости от расстояния до центра'
-)
+print (render_distance_profile(
+    df_meters,
+    'smoothed',
+    title='Зависимость стоимости от расстояния до центра',
+    name='spb_distance_profile'
+))
 
 
 # График резко меняется на значении x=7500. Значит, в центр входят все квартиры, у которых расстояне до центра меньше, чем 7500
@@ -513,19 +465,20 @@ df_meters.plot(
 # In[75]:
 
 
-spb_center = spb_data[spb_data['cityCenters_nearest'] < 7500]
-spb_center.reset_index(drop=True, inplace=True)
+# Сегменты задаются масками строк: корреляции, медианы и гистограммы берут строки сегмента по столбцу, без копии df
+spb_center_rows = spb_rows & (df['cityCenters_nearest'] < 7500)
 
-def get_median(df, columns, names):
+def get_median(df, rows, columns, names):
     print ("\n")
     for i in range(0, len(columns)):
-        print (f"Медиана {names[i]}: {df[columns[i]].median().round(3)}")
+        print (f"Медиана {names[i]}: {df[columns[i]][rows].median().round(3)}")
     return 
 
 print ("\nЦентр Санкт-Петербурга:")
-print (spb_center.corr()['last_price'].reset_index(name='correlation'))
+print (correlate(df, 'last_price', rows=spb_center_rows))
 get_median(
-    spb_center,
+    df,
+    spb_center_rows,
     [
         'last_price',
         'ceiling_height',
@@ -543,9 +496,10 @@ get_median(
 )
 
 print ("\n\nВесь город: ")
-print (spb_data.corr()['last_price'].reset_index(name='correlation'))
+print (correlate(df, 'last_price', rows=spb_rows))
 get_median(
-    spb_data,
+    df,
+    spb_rows,
     [
         'last_price',
         'ceiling_height',
@@ -563,34 +517,16 @@ get_median(
 )
 
 
-# Как видим, общие показатели зависимости параметров практически не отличаются. Переведем выше полученные показатели в удобочитаемую таблицу:
+# Как видим, общие показатели зависимости параметров практически не отличаются. Соберём эти показатели в удобочитаемую таблицу - считаем их по данным, а не переписываем вручную:
 
 # In[76]:
 
 
-names = [
-    'Зависимость цены от квадратного метра', 
-    'Зависимость цены от этажа', 
-    'Зависимость цены от количества комнат', 
-    'Зависимость цены от удаленности от цента',
-    'Зависимость цены от высоты потолков',
-    'Зависимость цены от дня публикации',
-    'Зависимость цены от месяца публикации',
-    'Зависимость цены от года публикации',
-    'Медиана цены квартиры',
-    'Медиана высоты потолков',
-    'Медиана жилой площади',
-    'Медиана площади кухни',
-    'Медиана количества комнат',
-]
-
-city_total_spb = { 
-    'spb_total': [0.76, -0.03, 0.37, -0.25, 0.06, 0.00, 0.00, -0.04, 5500000.0, 2.65, 31.2, 9.7, 2.0],
-    'spb_center': [0.79, -0.06, 0.31, -0.04, 0.07, 0.02, -0.01, -0.04, 9200000.0, 2.8, 46.0, 11.9, 3.0]
-}
-
-compare_df = pd.DataFrame(city_total_spb, index=names)
-compare_df['difference'] = (compare_df['spb_total'] - compare_df['spb_center']).round(2)
+spb_segments = SegmentComparison(df)
+spb_segments.add('spb_total', spb_rows)
+spb_segments.add('spb_center', spb_center_rows)
+
+compare_df = spb_segments.compare('spb_total', 'spb_center')
 compare_df
 
 
@@ -600,7 +536,7 @@ compare_df
 
 
 print_hist_plots(
-    spb_center, 
+    HistogramCache(df, spb_center_rows), 
     ['last_price', 'rooms', 'ceiling_height', 'days_exposition'],
     [30, 5, 10, 50],
     [(0, 15000000), (0, 5), (2.25, 3.25), (0, 300)],
@@ -610,10 +546,22 @@ print_hist_plots(
         'Гистограмма зависимости числа комнат в квартире от количества продаж',
         'Гистограмма зависимости высоты потолков в квартире от количества продаж',
         'Гистограмма зависимости срока продажи квартиры от количества продаж'
-    ]
+    ],
+    prefix='spb_center'
 )
 
 
+# Найденные факторы соберём в модель рыночной стоимости (valuation.py): медиана цены квадратного метра населённого пункта и поправки на площадь, число комнат, этаж, расстояние до центра и высоту потолков. Поправки - множители цены квадратного метра на единицу признака:
+
+# In[ ]:
+
+
+valuation = ValuationModel(df)
+print (np.exp(valuation.get_coefficients()).round(3))
+spb_center_sample = df.loc[df.index[spb_center_rows][:5]]
+print (valuation.predict(spb_center_sample).join(spb_center_sample['last_price'], rsuffix='_actual'))
+
+
 # ### Вывод
 # На стоимость квартиры прямо и очень сильно влияют:
 # 
@@ -0,0 +1,73 @@
+"""Сравнение сегментов объявлений: корреляции с ценой и медианы параметров"""
+
+import numpy as np
+import pandas as pd
+
+from correlation import correlate
+
+CORRELATIONS = {
+    'Зависимость цены от квадратного метра': 'square_meter_price',
+    'Зависимость цены от этажа': 'floor_kind',
+    'Зависимость цены от количества комнат': 'rooms',
+    'Зависимость цены от удаленности от цента': 'cityCenters_nearest',
+    'Зависимость цены от высоты потолков': 'ceiling_height',
+    'Зависимость цены от дня публикации': 'day_exposition',
+    'Зависимость цены от месяца публикации': 'month_exposition',
+    'Зависимость цены от года публикации': 'year_exposition',
+}
+MEDIANS = {
+    'Медиана цены квартиры': 'last_price',
+    'Медиана высоты потолков': 'ceiling_height',
+    'Медиана жилой площади': 'living_area',
+    'Медиана площади кухни': 'kitchen_area',
+    'Медиана количества комнат': 'rooms',
+}
+
+
+class SegmentComparison:
+    """Показатели именованных сегментов одного датафрейма.
+
+    Показатели сегмента считаются один раз при добавлении и хранятся по
+    имени, поэтому новый сегмент не пересчитывает уже добавленные. df может
+    быть None, если все сегменты добавляются готовыми через add_segment.
+    """
+
+    def __init__(self, df, target='last_price', correlations=CORRELATIONS, medians=MEDIANS):
+        self.df = df
+        self.target = target
+        self.correlations = correlations
+        self.medians = medians
+        self._stats = {}
+
+    def add(self, name, mask=None):
+        """Добавление сегмента: mask - булева Series по строкам df, None - весь df"""
+        if name not in self._stats:
+            self._stats[name] = self._compute(self.df, mask)
+        return self._stats[name]
+
+    def add_segment(self, name, segment):
+        """Добавление сегмента, уже выбранного из данных (например, запросом lazy.LazyListings)"""
+        if name not in self._stats:
+            self._stats[name] = self._compute(segment)
+        return self._stats[name]
+
+    def compare(self, *names):
+        """Таблица показателей сегментов; для двух сегментов - ещё и разница"""
+        compare_df = pd.DataFrame({name: self._stats[name] for name in names})
+        if len(names) == 2:
+            compare_df['difference'] = (compare_df[names[0]] - compare_df[names[1]]).round(2)
+        return compare_df
+
+    def _compute(self, segment, rows=None):
+        """Все корреляции с целевым столбцом и все медианы строк rows сегмента (None - всех строк).
+
+        Строки маски выбираются по одному столбцу, без копии segment[rows].
+        """
+        correlations = correlate(segment, self.target, list(self.correlations.values()), rows=rows)
+        correlations = correlations['correlation'].round(2)
+        medians = [segment[column].median() if rows is None else segment[column][rows].median()
+                   for column in self.medians.values()]
+        return pd.Series(
+            [*correlations.to_numpy(), *np.round(medians, 3)],
+            index=[*self.correlations, *self.medians],
+        )
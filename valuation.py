@@ -0,0 +1,185 @@
+"""Оценка рыночной стоимости квартир: медиана цены квадратного метра и поправка по параметрам.
+
+Модель: log(цена м²) = log(медиана цены м² населённого пункта) + X @ coefficients.
+X - параметры квартиры из выводов Шага 4: логарифм площади, число комнат,
+первый и последний этаж, расстояние до центра в км (и признак того, что
+оно известно) и высота потолков. Коэффициенты - решение наименьших
+квадратов (np.linalg.lstsq) для отклонений от медианы населённого
+пункта. Населённые пункты, у которых в архиве меньше min_listings
+объявлений (по умолчанию - которых в архиве нет), получают общую медиану:
+на отложенной части архива медиана даже по нескольким объявлениям
+точнее общей.
+
+Обученная модель - таблица медиан и вектор коэффициентов, поэтому
+оценка пачки объявлений - один поиск по таблице и одно матричное
+умножение. Для проверки задержек модель можно поднять локальным
+HTTP-сервером:
+    python valuation.py --model .cache/valuation.pkl --port 8000
+    POST /predict {"listings": [{"locality_name": ..., "total_area": ..., ...}]}
+"""
+
+import argparse
+import json
+import os
+import pickle
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from cache import load_clean_listings
+from features import FLOOR_KINDS, get_floor_kind
+from ingest import DATASET
+
+MODEL_PATH = '.cache/valuation.pkl'
+MIN_LISTINGS = 1
+# Выбросы высоты потолков и числа комнат ограничиваются, чтобы не тянуть коэффициенты
+CEILING_RANGE = (2.4, 4.0)
+MAX_ROOMS = 7
+COEFFICIENTS = ['intercept', 'log_total_area', 'rooms', 'first_floor', 'last_floor',
+                'city_center_km', 'city_center_known', 'ceiling_height']
+
+
+class ValuationModel:
+    """Модель цены квадратного метра, обученная по очищенному датафрейму df"""
+
+    def __init__(self, df, min_listings=MIN_LISTINGS, by='locality_name'):
+        self.by = by
+        price = (df['last_price'] / df['total_area']).to_numpy(dtype='float64', na_value=np.nan)
+        valid = np.isfinite(price) & (price > 0)
+        log_price = pd.Series(np.log(price[valid]), index=df.index[valid])
+
+        stats = log_price.groupby(df[by][valid], observed=True).agg(['count', 'median'])
+        self.default = float(log_price.median())
+        self.medians = stats.loc[stats['count'] >= min_listings, 'median']
+        self.ceiling = float(df['ceiling_height'].median())
+
+        fitted = df[valid]
+        features = self._features(fitted)
+        residuals = log_price.to_numpy() - self._log_medians(fitted)
+        self.coefficients, *_ = np.linalg.lstsq(features, residuals, rcond=None)
+
+    def predict(self, frame):
+        """Цена квадратного метра и цена квартиры для каждого объявления frame.
+
+        Нужны столбцы locality_name, total_area, rooms, cityCenters_nearest,
+        ceiling_height и floor_kind (или floor и floors_total).
+        """
+        log_price = self._log_medians(frame) + self._features(frame) @ self.coefficients
+        square_meter_price = np.exp(log_price)
+        return pd.DataFrame({
+            'square_meter_price': square_meter_price,
+            'last_price': square_meter_price * frame['total_area'].to_numpy(dtype='float64', na_value=np.nan),
+        }, index=frame.index)
+
+    def get_coefficients(self):
+        """Коэффициенты поправки: множитель цены м² за единицу признака - exp(коэффициент)"""
+        return pd.Series(self.coefficients, index=COEFFICIENTS)
+
+    def save(self, path=MODEL_PATH):
+        """Сохранение таблиц и коэффициентов модели"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as target:
+            pickle.dump(self, target)
+
+    @staticmethod
+    def load(path=MODEL_PATH):
+        with open(path, 'rb') as source:
+            return pickle.load(source)
+
+    def _log_medians(self, frame):
+        """Логарифм медианы цены м² населённого пункта; для неизвестных - общая медиана"""
+        # Последний элемент таблицы - общая медиана, на него указывает позиция -1
+        table = np.append(self.medians.to_numpy(), self.default)
+        names = frame[self.by]
+        if isinstance(names.dtype, pd.CategoricalDtype):
+            # Поиск по категориям, а не по строкам: коды -1 (пропуск) тоже попадают на общую медиану
+            positions = np.append(self.medians.index.get_indexer(names.cat.categories), -1)
+            return table[positions[names.cat.codes.to_numpy()]]
+        return table[self.medians.index.get_indexer(names)]
+
+    def _features(self, frame):
+        distance = frame['cityCenters_nearest'].to_numpy(dtype='float64', na_value=np.nan) / 1000
+        known = ~np.isnan(distance)
+        ceiling = frame['ceiling_height'].to_numpy(dtype='float64', na_value=np.nan)
+        if 'floor_kind' in frame.columns:
+            floor_kind = pd.Categorical(frame['floor_kind'], categories=FLOOR_KINDS).codes
+        else:
+            floor_kind = get_floor_kind(frame['floor'], frame['floors_total']).cat.codes.to_numpy()
+        return np.column_stack([
+            np.ones(len(frame)),
+            np.log(frame['total_area'].to_numpy(dtype='float64', na_value=np.nan)),
+            np.minimum(frame['rooms'].to_numpy(dtype='float64', na_value=np.nan), MAX_ROOMS),
+            floor_kind == FLOOR_KINDS.index('первый'),
+            floor_kind == FLOOR_KINDS.index('последний'),
+            np.where(known, distance, 0),
+            known,
+            np.clip(np.where(np.isnan(ceiling), self.ceiling, ceiling), *CEILING_RANGE),
+        ])
+
+
+class ValuationHandler(BaseHTTPRequestHandler):
+    """POST /predict: {"listings": [объявление, ...]} -> {"square_meter_price": [...], "last_price": [...]}"""
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._reply(404, {'error': f'unknown path {self.path}'})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            listings = body['listings']
+            # У пустого пакета нет столбцов: ответ - пустые списки, а не ошибка
+            result = (self.server.model.predict(pd.DataFrame(listings)) if listings
+                      else pd.DataFrame(columns=['square_meter_price', 'last_price']))
+        except (KeyError, TypeError, ValueError) as error:
+            self._reply(400, {'error': repr(error)})
+            return
+        # NaN в JSON не допускается: неоценённые объявления отдаются как null
+        self._reply(200, result.astype(object).where(result.notna(), None).to_dict('list'))
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ValuationServer(ThreadingHTTPServer):
+    """Поток на запрос; очередь соединений длиннее стандартной (5), чтобы параллельные клиенты не получали отказ"""
+
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_server(model, host='127.0.0.1', port=8000):
+    """Многопоточный HTTP-сервер модели; port=0 - свободный порт (server.server_port)"""
+    server = ValuationServer((host, port), ValuationHandler)
+    server.model = model
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dataset', default=DATASET)
+    parser.add_argument('--model', default=MODEL_PATH, help='файл модели; если его нет, модель обучается и сохраняется')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    if os.path.exists(args.model):
+        model = ValuationModel.load(args.model)
+    else:
+        model = ValuationModel(load_clean_listings(args.dataset))
+        model.save(args.model)
+    server = make_server(model, args.host, args.port)
+    print(f"http://{args.host}:{server.server_port}/predict")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()